@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from .html_extract import CRAWL_MAX_BYTES, extract_html
+
+CHUNK_SIZE = 64 * 1024
+
+
+def legacy_extract(html: str) -> tuple[Optional[str], list[str]]:
+    """The regex extraction PaperCrawler used before the streaming parser."""
+    title_match = re.search(r"<title>(.*?)</title>", html, flags=re.IGNORECASE | re.DOTALL)
+    title = title_match.group(1).strip() if title_match else None
+    paragraphs = re.findall(r"<p[^>]*>(.*?)</p>", html, flags=re.IGNORECASE | re.DOTALL)
+    return title, [re.sub("<.*?>", "", paragraph).strip() for paragraph in paragraphs if paragraph.strip()]
+
+
+def make_article(size: int) -> bytes:
+    head = "<html><head><title>大页面基准</title><script>" + "var x = 1;" * 2000 + "</script></head><body>"
+    paragraph = "<p>注意力机制把序列建模为 <b>加权求和</b> &amp; 并行计算。</p>\n"
+    body = paragraph * (size // len(paragraph.encode("utf-8")) + 1)
+    return (head + body + "</body></html>").encode("utf-8")
+
+
+def make_unclosed(size: int) -> bytes:
+    # Unterminated <p> and inline tags make the lazy regexes rescan to the end.
+    head = "<html><head><title>畸形页面</title></head><body>"
+    filler = "<p>没有结束标签的段落 <span>文本 " * (size // 60 + 1)
+    return (head + filler).encode("utf-8")
+
+
+def make_no_title(size: int) -> bytes:
+    # A missing </title> forces the title regex to scan the entire document.
+    return ("<html><head><title>" + "<div>内容 " * (size // 16 + 1)).encode("utf-8")
+
+
+PAGES: dict[str, Callable[[int], bytes]] = {
+    "article": make_article,
+    "unclosed": make_unclosed,
+    "no-title": make_no_title,
+}
+
+
+def _measure(run: Callable[[], object], repeat: int) -> tuple[float, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def bench(size_mb: float, repeat: int, pages: list[str]) -> list[dict[str, object]]:
+    size = int(size_mb * 1024 * 1024)
+    rows = []
+    for name in pages:
+        page = PAGES[name](size)
+        chunks = [page[offset : offset + CHUNK_SIZE] for offset in range(0, len(page), CHUNK_SIZE)]
+        legacy_time, legacy_peak = _measure(lambda: legacy_extract(page.decode("utf-8")), repeat)
+        stream_time, stream_peak = _measure(lambda: extract_html(iter(chunks), "utf-8"), repeat)
+        rows.append(
+            {
+                "page": name,
+                "mb": len(page) / (1024 * 1024),
+                "legacy_ms": legacy_time * 1000,
+                "legacy_peak_mb": legacy_peak,
+                "stream_ms": stream_time * 1000,
+                "stream_peak_mb": stream_peak,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare regex and streaming HTML extraction.")
+    # The regex path is quadratic on the "unclosed" page, so keep the default small.
+    parser.add_argument("--size-mb", type=float, default=0.25, help="size of each synthetic page")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pages", default=",".join(PAGES), help=f"comma-separated subset of {', '.join(PAGES)}")
+    args = parser.parse_args(argv)
+
+    print(f"streaming parser stops at {CRAWL_MAX_BYTES / (1024 * 1024):.1f} MiB or enough paragraphs")
+    header = f"{'page':<10}{'MiB':>7}{'regex ms':>11}{'regex MiB':>11}{'stream ms':>11}{'stream MiB':>12}"
+    print(header)
+    for row in bench(args.size_mb, args.repeat, args.pages.split(",")):
+        print(
+            f"{row['page']:<10}{row['mb']:>7.1f}{row['legacy_ms']:>11.1f}{row['legacy_peak_mb']:>11.1f}"
+            f"{row['stream_ms']:>11.1f}{row['stream_peak_mb']:>12.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from .problems import CaseGenerator
+
+CASE_CACHE_DIR = Path(
+    os.getenv("JUDGE_CASE_CACHE_DIR", Path(__file__).resolve().parent / ".case_cache")
+)
+
+_build_lock = threading.Lock()
+
+
+def generator_key(generator: CaseGenerator, entry: str) -> str:
+    material = json.dumps(
+        {
+            "entry": entry,
+            "version": generator["version"],
+            "source": generator["source"],
+            "reference": generator["reference"],
+            "count": generator["count"],
+            "seed": generator.get("seed", 0),
+        },
+        sort_keys=True,
+    )
+    return f"{entry}-{generator['version']}-{hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _load(source: str, name: str, label: str) -> Callable[..., Any]:
+    namespace: dict[str, Any] = {"__name__": label}
+    exec(compile(source, label, "exec"), namespace)
+    return namespace[name]
+
+
+def iter_generated_cases(generator: CaseGenerator, entry: str) -> Iterator[dict[str, Any]]:
+    make_case = _load(generator["source"], "make_case", "<case generator>")
+    reference = _load(generator["reference"], entry, "<case reference>")
+    seed = generator.get("seed", 0)
+    for index in range(generator["count"]):
+        args = make_case(random.Random(f"{seed}:{index}"), index)
+        frozen = json.loads(json.dumps(args))
+        yield {"args": frozen, "expected": reference(*args), "hidden": True}
+
+
+def generated_cases_path(generator: CaseGenerator, entry: str) -> Path:
+    path = CASE_CACHE_DIR / f"{generator_key(generator, entry)}.jsonl"
+    if path.exists():
+        return path
+    with _build_lock:
+        if path.exists():
+            return path
+        CASE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=CASE_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                for case in iter_generated_cases(generator, entry):
+                    handle.write(json.dumps(case) + "\n")
+            os.replace(temp_name, path)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+    return path
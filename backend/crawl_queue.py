@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from .crawler import PaperCrawler
+from .database import get_connection, upsert_papers
+
+CRAWL_MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "5"))
+CRAWL_BACKOFF_BASE_SEC = float(os.getenv("CRAWL_BACKOFF_BASE_SEC", "2"))
+CRAWL_BACKOFF_MAX_SEC = float(os.getenv("CRAWL_BACKOFF_MAX_SEC", "300"))
+CRAWL_QUEUE_INTERVAL_SEC = float(os.getenv("CRAWL_QUEUE_INTERVAL_SEC", "0"))
+CRAWL_QUEUE_POLL_SEC = float(os.getenv("CRAWL_QUEUE_POLL_SEC", "5"))
+# A running job not updated for this long belongs to a dead worker and is reclaimed.
+CRAWL_LEASE_SEC = float(os.getenv("CRAWL_LEASE_SEC", "300"))
+ACTIVE_STATUSES = ("queued", "running")
+
+
+@dataclass
+class CrawlJob:
+    id: str
+    url: str
+    topic: str
+    status: str
+    attempts: int
+    max_attempts: int
+    next_attempt_at: float
+    last_error: Optional[str]
+    paper_id: Optional[str]
+    created: float
+    updated: float
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "CrawlJob":
+        return cls(**{key: row[key] for key in row.keys()})
+
+
+def backoff_delay(attempts: int) -> float:
+    return min(CRAWL_BACKOFF_MAX_SEC, CRAWL_BACKOFF_BASE_SEC * 2 ** max(0, attempts - 1))
+
+
+def enqueue_crawl(url: str, topic: str, max_attempts: int = CRAWL_MAX_ATTEMPTS) -> CrawlJob:
+    """Queue ``url`` unless it is already queued or running; return the live job."""
+    now = time.time()
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM crawl_jobs WHERE url = ? AND status IN (?, ?)", (url, *ACTIVE_STATUSES)
+        ).fetchone()
+        if row is not None:
+            return CrawlJob.from_row(row)
+        job = CrawlJob(
+            id=uuid.uuid4().hex,
+            url=url,
+            topic=topic,
+            status="queued",
+            attempts=0,
+            max_attempts=max_attempts,
+            next_attempt_at=now,
+            last_error=None,
+            paper_id=None,
+            created=now,
+            updated=now,
+        )
+        conn.execute(
+            """
+            INSERT INTO crawl_jobs (
+                id, url, topic, status, attempts, max_attempts,
+                next_attempt_at, last_error, paper_id, created, updated
+            )
+            VALUES (
+                :id, :url, :topic, :status, :attempts, :max_attempts,
+                :next_attempt_at, :last_error, :paper_id, :created, :updated
+            )
+            """,
+            job.__dict__,
+        )
+    return job
+
+
+def get_crawl_job(job_id: str) -> Optional[CrawlJob]:
+    with get_connection() as conn:
+        row = conn.execute("SELECT * FROM crawl_jobs WHERE id = ?", (job_id,)).fetchone()
+    return CrawlJob.from_row(row) if row else None
+
+
+def claim_crawl_job(now: Optional[float] = None) -> Optional[CrawlJob]:
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        # A job whose worker died or hung on its last allowed attempt is not
+        # reclaimed; otherwise a URL that crashes the worker retries forever.
+        conn.execute(
+            """
+            UPDATE crawl_jobs SET status = 'failed', last_error = ?, updated = ?
+            WHERE status = 'running' AND updated <= ? AND attempts >= max_attempts
+            """,
+            ("Worker lease expired", now, now - CRAWL_LEASE_SEC),
+        )
+        row = conn.execute(
+            """
+            SELECT * FROM crawl_jobs
+            WHERE (status = 'queued' AND next_attempt_at <= ?)
+               OR (status = 'running' AND updated <= ?)
+            ORDER BY next_attempt_at LIMIT 1
+            """,
+            (now, now - CRAWL_LEASE_SEC),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE crawl_jobs SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+            (now, row["id"]),
+        )
+        row = conn.execute("SELECT * FROM crawl_jobs WHERE id = ?", (row["id"],)).fetchone()
+    return CrawlJob.from_row(row)
+
+
+def next_crawl_due() -> Optional[float]:
+    with get_connection() as conn:
+        row = conn.execute("SELECT min(next_attempt_at) FROM crawl_jobs WHERE status = 'queued'").fetchone()
+    return row[0]
+
+
+def complete_crawl_job(job_id: str, paper_id: str) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE crawl_jobs SET status = 'done', paper_id = ?, last_error = NULL, updated = ? WHERE id = ?",
+            (paper_id, time.time(), job_id),
+        )
+
+
+def fail_crawl_job(job_id: str, error: str, retry: bool = True, now: Optional[float] = None) -> CrawlJob:
+    """Schedule another attempt with exponential backoff, or give up."""
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        row = conn.execute("SELECT * FROM crawl_jobs WHERE id = ?", (job_id,)).fetchone()
+        job = CrawlJob.from_row(row)
+        if retry and job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.next_attempt_at = now + backoff_delay(job.attempts)
+        else:
+            job.status = "failed"
+        job.last_error = error
+        job.updated = now
+        conn.execute(
+            """
+            UPDATE crawl_jobs SET status = ?, next_attempt_at = ?, last_error = ?, updated = ?
+            WHERE id = ?
+            """,
+            (job.status, job.next_attempt_at, job.last_error, job.updated, job.id),
+        )
+    return job
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status in (408, 429)
+    return True
+
+
+class CrawlWorker:
+    """Drains crawl_jobs on a background thread at a bounded rate."""
+
+    def __init__(
+        self,
+        crawler: PaperCrawler,
+        interval_sec: float = CRAWL_QUEUE_INTERVAL_SEC,
+        poll_sec: float = CRAWL_QUEUE_POLL_SEC,
+    ):
+        self.crawler = crawler
+        self.interval_sec = interval_sec
+        self.poll_sec = poll_sec
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="crawl-worker", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> Optional[CrawlJob]:
+        job = claim_crawl_job()
+        if job is None:
+            return None
+        try:
+            paper = self.crawler.crawl(job.url, job.topic)
+            duplicates = upsert_papers([paper])
+        except Exception as exc:
+            return fail_crawl_job(job.id, str(exc) or type(exc).__name__, retry=_is_retryable(exc))
+        complete_crawl_job(job.id, duplicates.get(paper.id, paper.id))
+        return get_crawl_job(job.id)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.run_once()
+                due = None if job is not None else next_crawl_due()
+            except sqlite3.Error:
+                self._stop.wait(self.poll_sec)
+                continue
+            if job is not None:
+                if self.interval_sec > 0:
+                    self._stop.wait(self.interval_sec)
+                continue
+            timeout = self.poll_sec if due is None else min(self.poll_sec, max(0.0, due - time.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
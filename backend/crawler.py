@@ -1,12 +1,24 @@
+import asyncio
 import hashlib
+import json
+import os
 import re
-from dataclasses import dataclass
-from typing import Iterable, Optional
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Optional
 
 import httpx
 
+from .html_extract import CRAWL_MAX_BYTES, extract_html
 from .models import Paper, Source
 
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "16"))
+CRAWL_PER_HOST = int(os.getenv("CRAWL_PER_HOST", "2"))
+CRAWL_TIMEOUT_SEC = float(os.getenv("CRAWL_TIMEOUT_SEC", "10"))
+CRAWL_CACHE_DIR = Path(os.getenv("CRAWL_CACHE_DIR", Path(__file__).resolve().parent / ".crawl_cache"))
+
 
 def slugify(text: str) -> str:
     slug = re.sub(r"[^a-zA-Z0-9]+", "-", text.lower()).strip("-")
@@ -19,6 +31,23 @@ def split_sentences(text: str) -> list[str]:
     return [chunk for chunk in chunks if chunk]
 
 
+# Filler the transcriber uses when the page yields too little text.
+FILLER_SENTENCE = "{title} 探讨了 {topic} 的实践。"
+FILLER_STEP = "基于摘要生成的占位步骤"
+FILLER_GOOD = "{topic} 质量或效率更高"
+FILLER_BAD = "引入 {topic} 改动，需要额外算力或数据准备"
+
+
+def filler_texts(title: str, topic: str) -> set[str]:
+    """Every card text ``AiTranscriber`` may emit that is not from the page."""
+    return {
+        FILLER_SENTENCE.format(title=title, topic=topic),
+        FILLER_STEP,
+        FILLER_GOOD.format(topic=topic),
+        FILLER_BAD.format(topic=topic),
+    }
+
+
 @dataclass
 class Extraction:
     title: str
@@ -30,15 +59,15 @@ class AiTranscriber:
     def __call__(self, extraction: Extraction, url: str, topic: str) -> Paper:
         sentences = split_sentences(extraction.summary) or [extraction.title]
         padded = sentences + [
-            f"{extraction.title} 探讨了 {topic} 的实践。"
+            FILLER_SENTENCE.format(title=extraction.title, topic=topic)
         ] * (6 - len(sentences))
         hook, intuition, *rest = padded
         method_steps = rest[:3]
-        tradeoff_good = rest[3] if len(rest) > 3 else f"{topic} 质量或效率更高"
+        tradeoff_good = rest[3] if len(rest) > 3 else FILLER_GOOD.format(topic=topic)
         tradeoff_bad = (
             extraction.paragraphs[-1]
             if extraction.paragraphs
-            else f"引入 {topic} 改动，需要额外算力或数据准备"
+            else FILLER_BAD.format(topic=topic)
         )
 
         return Paper(
@@ -65,26 +94,270 @@ class AiTranscriber:
             prefix = f"步骤 {index + 1}："
             normalized.append(f"{prefix}{step.strip()}")
         while len(normalized) < 3:
-            normalized.append(f"步骤 {len(normalized) + 1}：基于摘要生成的占位步骤")
+            normalized.append(f"步骤 {len(normalized) + 1}：{FILLER_STEP}")
         return normalized
 
 
+class CrawlCache:
+    """On-disk store of validators, body hash and transcription per URL."""
+
+    def __init__(self, root: Path = CRAWL_CACHE_DIR):
+        self.root = Path(root)
+
+    def get(self, url: str) -> Optional[dict[str, Any]]:
+        try:
+            with self._path(url).open(encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, entry: dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(entry, handle, ensure_ascii=False)
+            os.replace(temp_name, self._path(url))
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+
+    def _path(self, url: str) -> Path:
+        return self.root / f"{hashlib.sha256(cache_url(url).encode('utf-8')).hexdigest()}.json"
+
+
+def cache_url(url: str) -> str:
+    return str(httpx.URL(url).copy_with(fragment=None))
+
+
+def conditional_headers(entry: Optional[dict[str, Any]]) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    if entry is None:
+        return headers
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def read_capped(chunks: Iterable[bytes], max_bytes: int = CRAWL_MAX_BYTES) -> list[bytes]:
+    """Collect a response body, stopping once ``max_bytes`` have arrived."""
+    body: list[bytes] = []
+    size = 0
+    for chunk in chunks:
+        body.append(chunk[: max_bytes - size])
+        size += len(body[-1])
+        if size >= max_bytes:
+            break
+    return body
+
+
+async def aread_capped(chunks: AsyncIterator[bytes], max_bytes: int = CRAWL_MAX_BYTES) -> list[bytes]:
+    body: list[bytes] = []
+    size = 0
+    async for chunk in chunks:
+        body.append(chunk[: max_bytes - size])
+        size += len(body[-1])
+        if size >= max_bytes:
+            break
+    return body
+
+
+@dataclass
+class ResponseBody:
+    chunks: list[bytes]
+    encoding: Optional[str] = None
+
+    def digest(self) -> str:
+        hasher = hashlib.sha256()
+        for chunk in self.chunks:
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+
+@dataclass
+class CrawlResult:
+    paper: Paper
+    cached: bool
+
+
 class PaperCrawler:
-    def __init__(self, client: Optional[httpx.Client] = None, transcriber: Optional[AiTranscriber] = None):
+    def __init__(
+        self,
+        client: Optional[httpx.Client] = None,
+        transcriber: Optional[AiTranscriber] = None,
+        cache: Optional[CrawlCache] = None,
+    ):
         self.client = client or httpx.Client(timeout=10)
         self.transcriber = transcriber or AiTranscriber()
+        self.cache = cache or CrawlCache()
 
     def crawl(self, url: str, topic: str) -> Paper:
-        response = self.client.get(url)
+        return self.fetch(url, topic).paper
+
+    def fetch(self, url: str, topic: str) -> CrawlResult:
+        entry = self.cache.get(url)
+        with self.client.stream("GET", url, headers=conditional_headers(entry)) as response:
+            chunks = read_capped(response.iter_bytes()) if response.is_success else []
+        return self.resolve(url, response, chunks, topic, entry)
+
+    def resolve(
+        self,
+        url: str,
+        response: httpx.Response,
+        chunks: list[bytes],
+        topic: str,
+        entry: Optional[dict[str, Any]],
+    ) -> CrawlResult:
+        """Turn a (possibly conditional) response into a paper.
+
+        A 304, or a 200 whose body hashes the same as last time, reuses the
+        cached transcription and skips extraction.
+        """
+        if response.status_code == 304 and entry is not None:
+            return CrawlResult(self._reuse(url, response, topic, entry), cached=True)
         response.raise_for_status()
+        body = ResponseBody(chunks, response.charset_encoding)
+        body_hash = body.digest()
+        if entry is not None and entry["body_hash"] == body_hash:
+            return CrawlResult(self._reuse(url, response, topic, entry), cached=True)
+
+        extraction = self._extract(body, response.url)
+        paper = self.transcriber(extraction, url=str(response.url), topic=topic)
+        self.cache.put(
+            url,
+            {
+                "url": str(response.url),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "body_hash": body_hash,
+                "extraction": asdict(extraction),
+                "topic": topic,
+                "paper": paper.model_dump(),
+            },
+        )
+        return CrawlResult(paper, cached=False)
+
+    def _reuse(self, url: str, response: httpx.Response, topic: str, entry: dict[str, Any]) -> Paper:
+        updated = dict(entry)
+        updated["etag"] = response.headers.get("etag") or entry.get("etag")
+        updated["last_modified"] = response.headers.get("last-modified") or entry.get("last_modified")
+        if entry["topic"] == topic:
+            paper = Paper.model_validate(entry["paper"])
+        else:
+            extraction = Extraction(**entry["extraction"])
+            paper = self.transcriber(extraction, url=entry["url"], topic=topic)
+            updated["topic"] = topic
+            updated["paper"] = paper.model_dump()
+        if updated != entry:
+            self.cache.put(url, updated)
+        return paper
+
+    def _extract(self, body: ResponseBody, resolved_url: httpx.URL) -> Extraction:
+        title, paragraphs = extract_html(body.chunks, body.encoding)
+        if title is None:
+            title = resolved_url.host or "未知论文"
+        summary = " ".join(paragraphs[:3]) if paragraphs else title
+        return Extraction(title=title, summary=summary, paragraphs=paragraphs)
+
+
+@dataclass
+class CrawlOutcome:
+    url: str
+    paper: Optional[Paper] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+
+@dataclass
+class _HostSlot:
+    semaphore: asyncio.Semaphore
+    users: int = 0
+
+
+class BatchCrawler:
+    """Crawls many URLs on one pooled async client.
+
+    ``concurrency`` caps requests in flight overall and ``per_host`` caps
+    them per host so a batch from one site does not hammer it.
+    """
+
+    def __init__(
+        self,
+        crawler: PaperCrawler,
+        concurrency: int = CRAWL_CONCURRENCY,
+        per_host: int = CRAWL_PER_HOST,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.crawler = crawler
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self._client = client
+        self._hosts: dict[str, _HostSlot] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=CRAWL_TIMEOUT_SEC,
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def crawl_many(self, urls: Iterable[str], topic: str) -> AsyncIterator[CrawlOutcome]:
+        """Yield one outcome per unique URL, in completion order."""
+        limit = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.create_task(self._crawl_one(url, topic, limit)) for url in dict.fromkeys(urls)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _crawl_one(self, url: str, topic: str, limit: asyncio.Semaphore) -> CrawlOutcome:
+        try:
+            host = httpx.URL(url).host
+        except httpx.InvalidURL as exc:
+            return CrawlOutcome(url=url, error=str(exc))
+        try:
+            # Cache I/O, parsing and transcription are blocking; keep them off the loop.
+            entry = await asyncio.to_thread(self.crawler.cache.get, url)
+            async with self._polite(host), limit:
+                async with self.client.stream("GET", url, headers=conditional_headers(entry)) as response:
+                    chunks = await aread_capped(response.aiter_bytes()) if response.is_success else []
+            result = await asyncio.to_thread(self.crawler.resolve, url, response, chunks, topic, entry)
+            return CrawlOutcome(url=url, paper=result.paper, cached=result.cached)
+        except Exception as exc:
+            # One bad URL (or an unwritable cache) must not abort the whole batch.
+            return CrawlOutcome(url=url, error=str(exc) or type(exc).__name__)
 
-        extraction = self._extract(response.text, response.url)
-        return self.transcriber(extraction, url=str(response.url), topic=topic)
+    @asynccontextmanager
+    async def _polite(self, host: str) -> AsyncIterator[None]:
+        """Hold one of the host's ``per_host`` slots.
 
-    def _extract(self, html: str, resolved_url: httpx.URL) -> Extraction:
-        title_match = re.search(r"<title>(.*?)</title>", html, flags=re.IGNORECASE | re.DOTALL)
-        title = title_match.group(1).strip() if title_match else resolved_url.host or "未知论文"
-        paragraphs = re.findall(r"<p[^>]*>(.*?)</p>", html, flags=re.IGNORECASE | re.DOTALL)
-        cleaned_paragraphs = [re.sub("<.*?>", "", paragraph).strip() for paragraph in paragraphs if paragraph.strip()]
-        summary = " ".join(cleaned_paragraphs[:3]) if cleaned_paragraphs else title
-        return Extraction(title=title, summary=summary, paragraphs=cleaned_paragraphs)
+        The entry is shared by every batch crawling the host and dropped once
+        nothing holds or waits on it, so ``_hosts`` only tracks active hosts.
+        """
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = self._hosts[host] = _HostSlot(asyncio.Semaphore(self.per_host))
+        slot.users += 1
+        try:
+            async with slot.semaphore:
+                yield
+        finally:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._hosts[host]
@@ -1,41 +1,57 @@
+import hashlib
 import json
-from functools import lru_cache
 from pathlib import Path
+from typing import Any, Iterator
 
+from .database import sync_seeds
 from .models import Paper, Source
 
 DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "paper_seeds.json"
 
 
-@lru_cache(maxsize=1)
-def load_sample_papers() -> list[Paper]:
+def _load_seeds() -> list[dict[str, Any]]:
     with DATA_PATH.open(encoding="utf-8") as handle:
-        seeds = json.load(handle)
-
-    papers: list[Paper] = []
-    for seed in seeds:
-        papers.append(
-            Paper(
-                id=seed["id"],
-                title=seed["title"],
-                topic=seed["topic"],
-                source=Source(**seed["source"]),
-                cards=[
-                    {"type": "hook", "text": seed["cards"]["hook"]},
-                    {"type": "intuition", "text": seed["cards"]["intuition"]},
-                    {"type": "method", "steps": seed["cards"]["method"]},
-                    {
-                        "type": "tradeoff",
-                        "good": seed["cards"]["tradeoff"]["good"],
-                        "bad": seed["cards"]["tradeoff"]["bad"],
-                    },
-                    {
-                        "type": "who",
-                        "do": seed["cards"]["who"]["do"],
-                        "skip": seed["cards"]["who"]["skip"],
-                    },
-                    {"type": "source", "title": seed["source"]["title"], "url": seed["source"]["url"]},
-                ],
-            )
-        )
-    return papers
+        return json.load(handle)
+
+
+def paper_from_seed(seed: dict[str, Any]) -> Paper:
+    return Paper(
+        id=seed["id"],
+        title=seed["title"],
+        topic=seed["topic"],
+        source=Source(**seed["source"]),
+        cards=[
+            {"type": "hook", "text": seed["cards"]["hook"]},
+            {"type": "intuition", "text": seed["cards"]["intuition"]},
+            {"type": "method", "steps": seed["cards"]["method"]},
+            {
+                "type": "tradeoff",
+                "good": seed["cards"]["tradeoff"]["good"],
+                "bad": seed["cards"]["tradeoff"]["bad"],
+            },
+            {
+                "type": "who",
+                "do": seed["cards"]["who"]["do"],
+                "skip": seed["cards"]["who"]["skip"],
+            },
+            {"type": "source", "title": seed["source"]["title"], "url": seed["source"]["url"]},
+        ],
+    )
+
+
+def seed_file_hash() -> str:
+    return hashlib.sha256(DATA_PATH.read_bytes()).hexdigest()
+
+
+def seed_hash(seed: dict[str, Any]) -> str:
+    material = json.dumps(seed, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _seed_entries() -> Iterator[tuple[str, str, dict[str, Any]]]:
+    for seed in _load_seeds():
+        yield seed["id"], seed_hash(seed), seed
+
+
+def sync_sample_papers() -> dict[str, Any]:
+    return sync_seeds(seed_file_hash(), _seed_entries, paper_from_seed)
@@ -1,20 +1,144 @@
 import json
 import os
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
 
+from .dedup import find_duplicate, index_signature, remove_signatures, signature
 from .models import Paper, Source
+from .response_cache import get_response_cache
 
 DB_PATH = Path(
     os.getenv("PAPER_DB_PATH", Path(__file__).resolve().parent / "papers.db")
 )
+DB_POOL_SIZE = int(os.getenv("PAPER_DB_POOL_SIZE", "8"))
+DB_STATEMENT_CACHE = int(os.getenv("PAPER_DB_STATEMENT_CACHE", "128"))
+DB_PRAGMAS: dict[str, Any] = {
+    "journal_mode": os.getenv("PAPER_DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("PAPER_DB_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("PAPER_DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("PAPER_DB_CACHE_SIZE", "-16000")),
+    "busy_timeout": int(os.getenv("PAPER_DB_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": os.getenv("PAPER_DB_TEMP_STORE", "MEMORY"),
+}
+# How long a worker keeps waiting for another worker's seed sync to finish.
+SEED_SYNC_WAIT_SEC = float(os.getenv("PAPER_SEED_SYNC_WAIT_SEC", "600"))
 
 
-def get_connection() -> sqlite3.Connection:
-    connection = sqlite3.connect(DB_PATH)
-    connection.row_factory = sqlite3.Row
-    return connection
+class ConnectionPool:
+    def __init__(
+        self,
+        path: Path,
+        size: int = DB_POOL_SIZE,
+        pragmas: Optional[dict[str, Any]] = None,
+        statement_cache: int = DB_STATEMENT_CACHE,
+    ):
+        self.path = path
+        self.size = max(1, size)
+        self.pragmas = dict(DB_PRAGMAS if pragmas is None else pragmas)
+        self.statement_cache = statement_cache
+        self._idle: list[sqlite3.Connection] = []
+        self._created = 0
+        self._available = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+
+    def stats(self) -> dict[str, Any]:
+        with self._available:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "waitTime": self.wait_time,
+                "pragmas": self.pragmas,
+            }
+
+    def close(self) -> None:
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._available:
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            if self._created >= self.size:
+                started = time.monotonic()
+                while not self._idle:
+                    self._available.wait()
+                self.waits += 1
+                self.wait_time += time.monotonic() - started
+                return self._idle.pop()
+            self._created += 1
+            self.misses += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+def close_db_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def get_connection():
+    return get_db_pool().connection()
 
 
 def init_db() -> None:
@@ -27,48 +151,515 @@ def init_db() -> None:
                 topic TEXT NOT NULL,
                 source_title TEXT NOT NULL,
                 source_url TEXT NOT NULL,
-                cards TEXT NOT NULL
+                cards TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(papers)")}
+        if "version" not in columns:
+            conn.execute("ALTER TABLE papers ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_topic_id ON papers(topic, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_version ON papers(version)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paper_tombstones (
+                id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_paper_tombstones_version ON paper_tombstones(version)"
+        )
+        # Trigram tokenisation indexes CJK text without a word segmenter.
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts
+            USING fts5(title, topic, body, tokenize = 'trigram')
+            """
+        )
+        # Trigrams cannot match two-character terms, the most common length
+        # for Chinese words, so CJK text is also indexed as bigram tokens.
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS papers_bigram
+            USING fts5(title, topic, body, tokenize = 'unicode61')
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seed_hashes (
+                id TEXT PRIMARY KEY,
+                hash TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_jobs (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                paper_id TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+        # At most one queued or running job per URL.
+        conn.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_crawl_jobs_active_url
+            ON crawl_jobs(url) WHERE status IN ('queued', 'running')
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_crawl_jobs_due ON crawl_jobs(status, next_attempt_at)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paper_signatures (
+                id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+            """
+        )
+        # LSH buckets: papers sharing any (band, bucket) are duplicate candidates.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paper_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, id)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_paper_buckets_id ON paper_buckets(id)")
+        unversioned = [
+            row[0] for row in conn.execute("SELECT rowid FROM papers WHERE version = 0 ORDER BY rowid")
+        ]
+        if unversioned:
+            first = _next_versions(conn, len(unversioned))
+            conn.executemany(
+                "UPDATE papers SET version = ? WHERE rowid = ?",
+                [(first + offset, rowid) for offset, rowid in enumerate(unversioned)],
+            )
+        stored = conn.execute("SELECT count(*) FROM papers").fetchone()[0]
+        indexed = [
+            conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("papers_fts", "papers_bigram")
+        ]
+        if indexed != [stored, stored]:
+            _rebuild_search_index(conn)
+
+
+def upsert_papers(papers: Iterable[Paper], dedup: bool = True) -> dict[str, str]:
+    """Write papers and return ``{skipped_id: existing_id}`` for near-duplicates.
+
+    A new paper whose MinHash signature matches another stored paper is not
+    written; callers should treat the existing id as the result. Papers
+    whose id is already stored are written as updates if their content
+    changed and skipped if it did not.
+    """
+    duplicates: dict[str, str] = {}
+    with get_connection() as conn:
+        accepted: list[Paper] = []
+        for paper in papers:
+            if _is_stored(conn, _paper_row(paper)):
+                continue
+            sig = signature(paper)
+            if (
+                dedup
+                and sig is not None
+                and conn.execute("SELECT 1 FROM papers WHERE id = ?", (paper.id,)).fetchone() is None
+            ):
+                match = find_duplicate(conn, paper.id, sig)
+                if match is not None:
+                    duplicates[paper.id] = match[0]
+                    continue
+            # Index immediately so later papers in the same batch are checked against it.
+            index_signature(conn, paper.id, sig)
+            accepted.append(paper)
+        written = _write_papers(conn, accepted, index=False)
+    if written:
+        get_response_cache().invalidate()
+    return duplicates
+
+
+def delete_papers(paper_ids: Iterable[str]) -> int:
+    with get_connection() as conn:
+        removed = _delete_papers(conn, paper_ids)
+    if removed:
+        get_response_cache().invalidate()
+    return removed
+
+
+def paper_version() -> int:
+    """Version of the latest paper write made by any process."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT value FROM sync_state WHERE name = 'paper_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def _next_versions(conn: sqlite3.Connection, count: int) -> int:
+    """Reserve ``count`` consecutive change versions and return the first."""
+    last = conn.execute(
+        """
+        INSERT INTO sync_state (name, value) VALUES ('paper_version', :count)
+        ON CONFLICT(name) DO UPDATE SET value = CAST(value AS INTEGER) + :count
+        RETURNING value
+        """,
+        {"count": count},
+    ).fetchone()[0]
+    return int(last) - count + 1
+
+
+def _paper_row(paper: Paper) -> dict[str, Any]:
+    return {
+        "id": paper.id,
+        "title": paper.title,
+        "topic": paper.topic,
+        "source_title": paper.source.title,
+        "source_url": paper.source.url,
+        "cards": json.dumps([card.model_dump() for card in paper.cards]),
+    }
+
+
+def _is_stored(conn: sqlite3.Connection, row: dict[str, Any]) -> bool:
+    """Whether the papers table already holds exactly this row."""
+    stored = conn.execute(
+        "SELECT title, topic, source_title, source_url, cards FROM papers WHERE id = ?", (row["id"],)
+    ).fetchone()
+    return stored is not None and tuple(stored) == (
+        row["title"], row["topic"], row["source_title"], row["source_url"], row["cards"]
+    )
+
+
+def _write_papers(conn: sqlite3.Connection, papers: Iterable[Paper], index: bool = True) -> int:
+    """Write papers whose content changed and return how many were written.
+
+    Rewriting an identical paper is a no-op, so it takes no new version and
+    does not show up in the change feed.
+    """
+    rows = []
+    for paper in papers:
+        row = _paper_row(paper)
+        if _is_stored(conn, row):
+            continue
+        if index:
+            index_signature(conn, paper.id, signature(paper))
+        row["body"] = _card_text(paper.cards)
+        rows.append(row)
+    if not rows:
+        return 0
+    first = _next_versions(conn, len(rows))
+    for offset, row in enumerate(rows):
+        row["version"] = first + offset
+    # ON CONFLICT keeps the rowid stable so the FTS row can be replaced in place.
+    conn.executemany(
+        """
+        INSERT INTO papers (id, title, topic, source_title, source_url, cards, version)
+        VALUES (:id, :title, :topic, :source_title, :source_url, :cards, :version)
+        ON CONFLICT(id) DO UPDATE SET
+            title = excluded.title,
+            topic = excluded.topic,
+            source_title = excluded.source_title,
+            source_url = excluded.source_url,
+            cards = excluded.cards,
+            version = excluded.version
+        """,
+        rows,
+    )
+    conn.executemany("DELETE FROM paper_tombstones WHERE id = :id", rows)
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO papers_fts (rowid, title, topic, body)
+        SELECT rowid, :title, :topic, :body FROM papers WHERE id = :id
+        """,
+        rows,
+    )
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO papers_bigram (rowid, title, topic, body)
+        SELECT rowid, :title, :topic, :body FROM papers WHERE id = :id
+        """,
+        [_bigram_row(row) for row in rows],
+    )
+    return len(rows)
+
+
+def _delete_papers(conn: sqlite3.Connection, paper_ids: Iterable[str]) -> int:
+    unique_ids = list(dict.fromkeys(paper_ids))
+    existing = [
+        row["id"]
+        for paper_id in unique_ids
+        for row in conn.execute("SELECT id FROM papers WHERE id = ?", (paper_id,))
+    ]
+    if not existing:
+        return 0
+    first = _next_versions(conn, len(existing))
+    params = [(paper_id,) for paper_id in existing]
+    for table in ("papers_fts", "papers_bigram"):
+        conn.executemany(
+            f"DELETE FROM {table} WHERE rowid = (SELECT rowid FROM papers WHERE id = ?)", params
+        )
+    conn.executemany("DELETE FROM papers WHERE id = ?", params)
+    remove_signatures(conn, existing)
+    conn.executemany(
+        "INSERT OR REPLACE INTO paper_tombstones (id, version) VALUES (?, ?)",
+        [(paper_id, first + offset) for offset, paper_id in enumerate(existing)],
+    )
+    return len(existing)
+
 
+def sync_seeds(
+    source_hash: str,
+    entries: Callable[[], Iterable[tuple[str, str, Any]]],
+    build: Callable[[Any], Paper],
+) -> dict[str, Any]:
+    """Bring seeded rows in line with the seed file, touching only changed seeds.
 
-def upsert_papers(papers: Iterable[Paper]) -> None:
+    ``entries`` yields ``(paper_id, content_hash, seed)`` and is only called
+    when the file hash differs from the last sync. The write lock is taken
+    with BEGIN IMMEDIATE so concurrent workers wait and then see the
+    finished sync instead of repeating it, however long it takes.
+    """
+    result: dict[str, Any] = {"skipped": True, "written": 0, "removed": 0}
+    if _seed_source_hash() == source_hash:
+        return result
     with get_connection() as conn:
+        if not _begin_seed_sync(conn, source_hash):
+            return result
+        known = dict(conn.execute("SELECT id, hash FROM seed_hashes").fetchall())
+        current: dict[str, str] = {}
+        changed: list[Any] = []
+        for paper_id, digest, seed in entries():
+            current[paper_id] = digest
+            if known.get(paper_id) != digest:
+                changed.append(seed)
+        removed = [paper_id for paper_id in known if paper_id not in current]
+        result["written"] = _write_papers(conn, (build(seed) for seed in changed))
+        result["removed"] = _delete_papers(conn, removed)
+        conn.executemany("DELETE FROM seed_hashes WHERE id = ?", [(paper_id,) for paper_id in removed])
         conn.executemany(
-            """
-            INSERT OR REPLACE INTO papers (id, title, topic, source_title, source_url, cards)
-            VALUES (:id, :title, :topic, :source_title, :source_url, :cards)
-            """,
-            [
-                {
-                    "id": paper.id,
-                    "title": paper.title,
-                    "topic": paper.topic,
-                    "source_title": paper.source.title,
-                    "source_url": paper.source.url,
-                    "cards": json.dumps([card.model_dump() for card in paper.cards]),
-                }
-                for paper in papers
-            ],
+            "INSERT OR REPLACE INTO seed_hashes (id, hash) VALUES (?, ?)",
+            [(paper_id, digest) for paper_id, digest in current.items() if known.get(paper_id) != digest],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (name, value) VALUES ('seed_source', ?)", (source_hash,)
         )
+    result["skipped"] = False
+    if result["written"] or result["removed"]:
+        get_response_cache().invalidate()
+    return result
+
+
+def _begin_seed_sync(conn: sqlite3.Connection, source_hash: str) -> bool:
+    """Take the write lock for a seed sync, or return False once another
+    worker has finished the same sync.
+
+    Each BEGIN IMMEDIATE waits up to the busy timeout; a sync that holds the
+    lock for longer makes it fail with "database is locked", so keep retrying
+    (up to ``SEED_SYNC_WAIT_SEC``) rather than failing startup.
+    """
+    deadline = time.monotonic() + SEED_SYNC_WAIT_SEC
+    while True:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as exc:
+            if "locked" not in str(exc) or time.monotonic() >= deadline:
+                raise
+            if _seed_source_hash(conn) == source_hash:
+                return False
+            continue
+        return _seed_source_hash(conn) != source_hash
+
 
+def _seed_source_hash(conn: Optional[sqlite3.Connection] = None) -> Optional[str]:
+    query = "SELECT value FROM sync_state WHERE name = 'seed_source'"
+    if conn is not None:
+        row = conn.execute(query).fetchone()
+    else:
+        with get_connection() as pooled:
+            row = pooled.execute(query).fetchone()
+    return row[0] if row else None
 
-def list_papers() -> list[Paper]:
+
+def _card_text(cards: Iterable[Any]) -> str:
+    parts: list[str] = []
+    for card in cards:
+        data = card.model_dump() if hasattr(card, "model_dump") else card
+        for key, value in data.items():
+            if key in ("type", "url"):
+                continue
+            if isinstance(value, list):
+                parts.extend(str(item) for item in value)
+            else:
+                parts.append(str(value))
+    return "\n".join(parts)
+
+
+def _cjk_bigrams(text: str) -> str:
+    """Overlapping two-character tokens for each run of CJK characters."""
+    return " ".join(
+        run[index : index + 2] for run in _CJK_RUN.findall(text) for index in range(len(run) - 1)
+    )
+
+
+def _bigram_row(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": row["id"],
+        "title": _cjk_bigrams(row["title"]),
+        "topic": _cjk_bigrams(row["topic"]),
+        "body": _cjk_bigrams(row["body"]),
+    }
+
+
+def _rebuild_search_index(conn: sqlite3.Connection) -> None:
+    rows = [
+        {
+            "rowid": row["rowid"],
+            "id": row["id"],
+            "title": row["title"],
+            "topic": row["topic"],
+            "body": _card_text(json.loads(row["cards"])),
+        }
+        for row in conn.execute("SELECT rowid, id, title, topic, cards FROM papers")
+    ]
+    conn.execute("DELETE FROM papers_fts")
+    conn.execute("DELETE FROM papers_bigram")
+    conn.executemany(
+        "INSERT INTO papers_fts (rowid, title, topic, body) VALUES (:rowid, :title, :topic, :body)", rows
+    )
+    conn.executemany(
+        "INSERT INTO papers_bigram (rowid, title, topic, body) VALUES (:rowid, :title, :topic, :body)",
+        [{**_bigram_row(row), "rowid": row["rowid"]} for row in rows],
+    )
+
+
+PAPER_FIELDS = ("id", "title", "topic", "source", "cards")
+_FIELD_COLUMNS = {
+    "id": ("id",),
+    "title": ("title",),
+    "topic": ("topic",),
+    "source": ("source_title", "source_url"),
+    "cards": ("cards",),
+}
+
+
+def _row_to_paper(row: sqlite3.Row) -> Paper:
+    return Paper(
+        id=row["id"],
+        title=row["title"],
+        topic=row["topic"],
+        source=Source(title=row["source_title"], url=row["source_url"]),
+        cards=json.loads(row["cards"]),
+    )
+
+
+def _project(row: sqlite3.Row, fields: Sequence[str]) -> dict[str, Any]:
+    projected: dict[str, Any] = {}
+    for field in fields:
+        if field == "source":
+            projected["source"] = {"title": row["source_title"], "url": row["source_url"]}
+        elif field == "cards":
+            projected["cards"] = json.loads(row["cards"])
+        else:
+            projected[field] = row[field]
+    return projected
+
+
+def _select_page(
+    columns: Sequence[str],
+    topic: Optional[str],
+    after: Optional[str],
+    limit: Optional[int],
+) -> list[sqlite3.Row]:
+    clauses: list[str] = []
+    params: list[Any] = []
+    if topic is not None:
+        clauses.append("topic = ?")
+        params.append(topic)
+    if after is not None:
+        clauses.append("id > ?")
+        params.append(after)
+    sql = f"SELECT {', '.join(columns)} FROM papers"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with get_connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def list_papers(
+    topic: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> list[Paper]:
+    rows = _select_page(
+        ("id", "title", "topic", "source_title", "source_url", "cards"), topic, after, limit
+    )
+    return [_row_to_paper(row) for row in rows]
+
+
+def list_paper_fields(
+    fields: Sequence[str],
+    topic: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    unknown = [field for field in fields if field not in _FIELD_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in fields:
+        fields = ["id", *fields]
+    columns = [column for field in fields for column in _FIELD_COLUMNS[field]]
+    return [_project(row, fields) for row in _select_page(columns, topic, after, limit)]
+
+
+def list_changes(since: int, limit: int) -> tuple[list[Paper], list[str], int, bool]:
+    """Return papers written and ids deleted after version ``since``.
+
+    The returned cursor is the highest version included in the page, so
+    passing it back as ``since`` resumes without gaps or repeats.
+    """
     with get_connection() as conn:
         rows = conn.execute(
-            "SELECT id, title, topic, source_title, source_url, cards FROM papers ORDER BY id"
+            """
+            SELECT id, version, title, topic, source_title, source_url, cards
+            FROM papers WHERE version > :since
+            UNION ALL
+            SELECT id, version, NULL, NULL, NULL, NULL, NULL
+            FROM paper_tombstones WHERE version > :since
+            ORDER BY version
+            LIMIT :limit
+            """,
+            {"since": since, "limit": limit + 1},
         ).fetchall()
-    return [
-        Paper(
-            id=row["id"],
-            title=row["title"],
-            topic=row["topic"],
-            source=Source(title=row["source_title"], url=row["source_url"]),
-            cards=json.loads(row["cards"]),
-        )
-        for row in rows
-    ]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    papers = [_row_to_paper(row) for row in rows if row["cards"] is not None]
+    deleted = [row["id"] for row in rows if row["cards"] is None]
+    cursor = rows[-1]["version"] if rows else since
+    return papers, deleted, cursor, has_more
 
 
 def fetch_paper(paper_id: str) -> Optional[Paper]:
@@ -82,10 +673,92 @@ def fetch_paper(paper_id: str) -> Optional[Paper]:
         ).fetchone()
     if not row:
         return None
-    return Paper(
-        id=row["id"],
-        title=row["title"],
-        topic=row["topic"],
-        source=Source(title=row["source_title"], url=row["source_url"]),
-        cards=json.loads(row["cards"]),
-    )
+    return _row_to_paper(row)
+
+
+SEARCH_SNIPPET_TOKENS = 32
+# Trigram MATCH needs at least three characters. Two-character CJK terms
+# (most Chinese words) go through the bigram index instead; anything else
+# shorter falls back to a substring filter.
+_MIN_MATCH_CHARS = 3
+_FTS_TEXT = "papers_fts.title || ' ' || papers_fts.topic || ' ' || papers_fts.body"
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def _quote_term(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _excerpt(text: str, term: str, width: int = SEARCH_SNIPPET_TOKENS) -> str:
+    index = text.lower().find(term.lower())
+    if index < 0:
+        return text[:width]
+    start = max(0, index - width // 2)
+    end = min(len(text), index + len(term) + width // 2)
+    hit = text[index : index + len(term)]
+    excerpt = text[start:index] + f"<mark>{hit}</mark>" + text[index + len(term) : end]
+    return ("…" if start > 0 else "") + excerpt + ("…" if end < len(text) else "")
+
+
+def search_papers(query: str, limit: int = 20, offset: int = 0) -> tuple[int, list[dict[str, Any]]]:
+    terms = query.split()
+    if not terms:
+        return 0, []
+    long_terms = [term for term in terms if len(term) >= _MIN_MATCH_CHARS]
+    bigram_terms = [term for term in terms if len(term) == 2 and _CJK_RUN.fullmatch(term)]
+    short_terms = [term for term in terms if term not in long_terms and term not in bigram_terms]
+
+    tables = "papers_fts"
+    clauses: list[str] = []
+    params: list[Any] = []
+    scores: list[str] = []
+    if long_terms:
+        clauses.append("papers_fts MATCH ?")
+        params.append(" ".join(_quote_term(term) for term in long_terms))
+        scores.append("bm25(papers_fts, 10.0, 5.0, 1.0)")
+    if bigram_terms:
+        tables += " JOIN papers_bigram ON papers_bigram.rowid = papers_fts.rowid"
+        clauses.append("papers_bigram MATCH ?")
+        params.append(" ".join(_quote_term(term) for term in bigram_terms))
+        scores.append("bm25(papers_bigram, 10.0, 5.0, 1.0)")
+    for term in short_terms:
+        clauses.append(f"instr(lower({_FTS_TEXT}), ?) > 0")
+        params.append(term.lower())
+    where = " AND ".join(clauses)
+
+    score = " + ".join(scores) if scores else "NULL"
+    if long_terms:
+        snippet = f"snippet(papers_fts, -1, '<mark>', '</mark>', '…', {SEARCH_SNIPPET_TOKENS})"
+    else:
+        snippet = _FTS_TEXT
+    columns = f"p.id, p.title, p.topic, {score} AS score, {snippet} AS snippet"
+    order = "score, p.id" if scores else "p.id"
+
+    with get_connection() as conn:
+        total = conn.execute(f"SELECT count(*) FROM {tables} WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"""
+            SELECT {columns}
+            FROM {tables} JOIN papers AS p ON p.rowid = papers_fts.rowid
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+            """,
+            [*params, limit, offset],
+        ).fetchall()
+
+    hits = []
+    for row in rows:
+        snippet = row["snippet"]
+        if not long_terms:
+            snippet = _excerpt(snippet, (bigram_terms + short_terms)[0])
+        hits.append(
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "topic": row["topic"],
+                "snippet": snippet,
+                "score": -row["score"] if row["score"] is not None else None,
+            }
+        )
+    return total, hits
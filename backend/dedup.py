@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+from array import array
+from typing import Any, Iterable, Optional, Sequence
+
+from .crawler import filler_texts
+from .models import Paper
+
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_ROWS = int(os.getenv("DEDUP_ROWS", "4"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+# Pages thinner than this are never matched: a few shingles say too little.
+DEDUP_MIN_SHINGLES = int(os.getenv("DEDUP_MIN_SHINGLES", "24"))
+SHINGLE_CHARS = 3
+NUM_PERM = DEDUP_BANDS * DEDUP_ROWS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_STEP_PREFIX = re.compile(r"^步骤 \d+：")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def paper_text(paper: Paper) -> str:
+    """Text the transcriber derived from the page, without its filler.
+
+    "who" cards and the padding ``AiTranscriber`` adds for thin pages are
+    left out, and repeated parts (a hook that is just the title) count once.
+    """
+    parts = [paper.title]
+    for card in paper.cards:
+        if card.type in ("hook", "intuition"):
+            parts.append(card.text)
+        elif card.type == "method":
+            parts.extend(_STEP_PREFIX.sub("", step) for step in card.steps)
+        elif card.type == "tradeoff":
+            parts.extend([card.good, card.bad])
+    filler = filler_texts(paper.title, paper.topic)
+    return " ".join(part for part in dict.fromkeys(parts) if part not in filler)
+
+
+def shingles(text: str) -> set[str]:
+    normalized = _NON_WORD.sub("", text.lower())
+    if len(normalized) <= SHINGLE_CHARS:
+        return {normalized} if normalized else set()
+    return {normalized[index : index + SHINGLE_CHARS] for index in range(len(normalized) - SHINGLE_CHARS + 1)}
+
+
+def signature(paper: Paper) -> Optional[list[int]]:
+    """MinHash of the paper's text, or None when it is too thin to compare."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little") % _PRIME
+        for shingle in shingles(paper_text(paper))
+    ]
+    if len(hashes) < DEDUP_MIN_SHINGLES:
+        return None
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(left: Sequence[int], right: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+def band_keys(sig: Sequence[int]) -> list[int]:
+    keys = []
+    for band in range(DEDUP_BANDS):
+        rows = array("Q", sig[band * DEDUP_ROWS : (band + 1) * DEDUP_ROWS]).tobytes()
+        digest = hashlib.blake2b(rows, digest_size=8, person=band.to_bytes(2, "little")).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def _pack(sig: Sequence[int]) -> bytes:
+    return array("Q", sig).tobytes()
+
+
+def _unpack(blob: bytes) -> list[int]:
+    return array("Q", blob).tolist()
+
+
+def _candidate_query(bands: int) -> str:
+    # One equality lookup per band so each hits the (band, bucket, id) primary
+    # key; a row-value IN (VALUES ...) list makes SQLite scan the whole table.
+    lookups = " UNION ".join(["SELECT id FROM paper_buckets WHERE band = ? AND bucket = ?"] * bands)
+    return f"SELECT s.id, s.signature FROM paper_signatures AS s WHERE s.id != ? AND s.id IN ({lookups})"
+
+
+def find_duplicate(
+    conn: sqlite3.Connection, paper_id: str, sig: Sequence[int], threshold: float = DEDUP_THRESHOLD
+) -> Optional[tuple[str, float]]:
+    """Return the most similar indexed paper above ``threshold``.
+
+    Only papers sharing at least one LSH band bucket are compared, so the
+    cost depends on the number of candidates rather than the corpus size.
+    """
+    keys = band_keys(sig)
+    params: list[Any] = [value for band, key in enumerate(keys) for value in (band, key)]
+    rows = conn.execute(_candidate_query(len(keys)), [paper_id, *params]).fetchall()
+    best: Optional[tuple[str, float]] = None
+    for row in rows:
+        score = similarity(sig, _unpack(row["signature"]))
+        if score >= threshold and (best is None or score > best[1] or (score == best[1] and row["id"] < best[0])):
+            best = (row["id"], score)
+    return best
+
+
+def index_signature(conn: sqlite3.Connection, paper_id: str, sig: Optional[Sequence[int]]) -> None:
+    """Store ``sig`` for the paper; a None signature just drops the old one."""
+    conn.execute("DELETE FROM paper_buckets WHERE id = ?", (paper_id,))
+    if sig is None:
+        conn.execute("DELETE FROM paper_signatures WHERE id = ?", (paper_id,))
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO paper_signatures (id, signature) VALUES (?, ?)", (paper_id, _pack(sig))
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO paper_buckets (band, bucket, id) VALUES (?, ?, ?)",
+        [(band, key, paper_id) for band, key in enumerate(band_keys(sig))],
+    )
+
+
+def remove_signatures(conn: sqlite3.Connection, paper_ids: Iterable[str]) -> None:
+    params = [(paper_id,) for paper_id in paper_ids]
+    conn.executemany("DELETE FROM paper_buckets WHERE id = ?", params)
+    conn.executemany("DELETE FROM paper_signatures WHERE id = ?", params)
+
+
+def backfill(rebuild: bool = False, threshold: float = DEDUP_THRESHOLD) -> dict[str, Any]:
+    """Index papers that have no signature yet and report near-duplicate pairs."""
+    from .database import get_connection, list_papers
+
+    papers = list_papers()
+    with get_connection() as conn:
+        if rebuild:
+            conn.execute("DELETE FROM paper_buckets")
+            conn.execute("DELETE FROM paper_signatures")
+        indexed = {row[0] for row in conn.execute("SELECT id FROM paper_signatures")}
+        missing = [paper for paper in papers if paper.id not in indexed]
+        signatures = {paper.id: signature(paper) for paper in missing}
+        for paper_id, sig in signatures.items():
+            index_signature(conn, paper_id, sig)
+        duplicates = []
+        for row in conn.execute("SELECT id, signature FROM paper_signatures ORDER BY id").fetchall():
+            match = find_duplicate(conn, row["id"], _unpack(row["signature"]), threshold)
+            if match is not None and match[0] < row["id"]:
+                duplicates.append({"id": row["id"], "duplicate_of": match[0], "similarity": match[1]})
+    return {
+        "papers": len(papers),
+        "indexed": sum(sig is not None for sig in signatures.values()),
+        "too_thin": sum(sig is None for sig in signatures.values()),
+        "duplicates": duplicates,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the near-duplicate index for stored papers.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every signature")
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    parser.add_argument("--delete", action="store_true", help="delete papers that duplicate an earlier id")
+    args = parser.parse_args(argv)
+
+    from .database import delete_papers, init_db
+
+    init_db()
+    report = backfill(rebuild=args.rebuild, threshold=args.threshold)
+    if args.delete and report["duplicates"]:
+        report["deleted"] = delete_papers(item["id"] for item in report["duplicates"])
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,40 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
+import py_compile
+import shutil
 import subprocess
 import tempfile
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, Optional
 
+from .case_generators import generated_cases_path
 from .problems import Problem
 
 MEMORY_LIMIT_MB = 256
 MEMORY_LIMIT_BYTES = MEMORY_LIMIT_MB * 1024 * 1024
+POOL_SIZE = int(os.getenv("JUDGE_POOL_SIZE", "2"))
+POOL_MAX_IDLE_SEC = float(os.getenv("JUDGE_POOL_MAX_IDLE_SEC", "300"))
+PROFILE_TOP = int(os.getenv("JUDGE_PROFILE_TOP", "15"))
+SCRATCH_ROOT = os.getenv("JUDGE_SCRATCH_DIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+WATCHDOG_GRACE_SEC = float(os.getenv("JUDGE_WATCHDOG_GRACE_SEC", "1.0"))
 
 RUNNER_SOURCE = """
-import importlib.util
 import json
+import linecache
+import os
+import signal
+import sys
+import time
 import traceback
+import types
 
 
 def _apply_limits():
@@ -52,82 +71,429 @@ def _disable_network():
         return
 
 
-def _load_solution():
-    spec = importlib.util.spec_from_file_location("solution", "solution.py")
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+class _CaseTimeout(BaseException):
+    pass
+
+
+def _on_alarm(_signum, _frame):
+    raise _CaseTimeout()
+
+
+_setitimer = signal.setitimer
+
+try:
+    import resource as _resource
+except Exception:
+    _resource = None
+
+
+def _peak_memory_kb():
+    if _resource is None:
+        return None
+    return _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+
+
+def _arm(seconds):
+    _setitimer(signal.ITIMER_REAL, max(seconds, 0.001))
+
+
+def _disarm():
+    _setitimer(signal.ITIMER_REAL, 0)
+
+
+def _load_solution(code):
+    filename = "solution.py"
+    linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+    module = types.ModuleType("solution")
+    module.__file__ = filename
+    sys.modules["solution"] = module
+    exec(compile(code, filename, "exec"), module.__dict__)
     return module
 
 
-def _normalize(value, precision):
-    if isinstance(value, float):
-        return round(value, precision)
-    if isinstance(value, list):
-        return [_normalize(item, precision) for item in value]
-    if isinstance(value, tuple):
-        return [_normalize(item, precision) for item in value]
-    if isinstance(value, dict):
-        return {key: _normalize(val, precision) for key, val in value.items()}
-    return value
+def _read_cases():
+    for line in sys.stdin:
+        if line.strip():
+            yield json.loads(line)
+
+
+_SEQUENCES = (list, tuple)
+
+
+def _is_number(value):
+    if isinstance(value, (int, float)):
+        return True
+    import numbers
+
+    return isinstance(value, numbers.Real)
+
+
+def _is_array_like(value):
+    return not isinstance(value, (str, bytes, dict, list, tuple)) and (
+        hasattr(value, "__array__") or hasattr(value, "tolist")
+    )
+
+
+def _close_array(actual, expected, abs_tol, rel_tol):
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is not None:
+        try:
+            left = numpy.asarray(actual, dtype=float)
+            right = numpy.asarray(expected, dtype=float)
+        except (TypeError, ValueError):
+            left = right = None
+        if left is not None:
+            return left.shape == right.shape and bool(
+                numpy.allclose(left, right, rtol=rel_tol, atol=abs_tol, equal_nan=True)
+            )
+    return _is_close(actual.tolist(), expected, abs_tol, rel_tol)
+
+
+def _is_close(actual, expected, abs_tol, rel_tol):
+    stack = [(actual, expected)]
+    while stack:
+        left, right = stack.pop()
+        if _is_number(right) and _is_number(left):
+            if left == right:
+                continue
+            left = float(left)
+            right = float(right)
+            if left != left and right != right:
+                continue
+            if abs(left - right) <= max(abs_tol, rel_tol * abs(right)):
+                continue
+            return False
+        if isinstance(right, _SEQUENCES):
+            if _is_array_like(left):
+                if not _close_array(left, right, abs_tol, rel_tol):
+                    return False
+                continue
+            if not isinstance(left, _SEQUENCES) or len(left) != len(right):
+                return False
+            stack.extend(zip(left, right))
+            continue
+        if isinstance(right, dict):
+            if not isinstance(left, dict) or left.keys() != right.keys():
+                return False
+            stack.extend((left[key], right[key]) for key in right)
+            continue
+        if left != right:
+            return False
+    return True
+
+
+def _to_json(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return repr(value)
+
+
+def _load_callable(source, name, label):
+    namespace = {"__name__": label}
+    exec(compile(source, label, "exec"), namespace)
+    return namespace[name]
+
+
+def _best_time(fn, make_args, size, repeat):
+    best = None
+    for _ in range(repeat):
+        args = make_args(size)
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _growth_exponent(sizes, timings):
+    import math
+
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(timing, 1e-9)) for timing in timings]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if not spread:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+
+
+def _check_performance(fn, entry, spec, left):
+    max_slowdown = spec.get("max_slowdown")
+    max_exponent = spec.get("max_exponent")
+    report = {
+        "ok": False,
+        "sizes": spec["sizes"],
+        "timings": [],
+        "referenceTimings": [],
+        "maxSlowdown": max_slowdown,
+        "maxExponent": max_exponent,
+    }
+    repeat = spec.get("repeat", 3)
+    try:
+        if left is not None:
+            if left <= 0:
+                raise _CaseTimeout()
+            _arm(left)
+        try:
+            make_args = _load_callable(spec["generator"], "make_args", "<generator>")
+            reference = _load_callable(spec["reference"], entry, "<reference>")
+            for size in spec["sizes"]:
+                report["referenceTimings"].append(_best_time(reference, make_args, size, repeat))
+                report["timings"].append(_best_time(fn, make_args, size, repeat))
+        finally:
+            _disarm()
+    except _CaseTimeout:
+        report["timeout"] = True
+        return report
+    except Exception:
+        report["error"] = traceback.format_exc()
+        return report
+
+    slowdown = report["timings"][-1] / max(report["referenceTimings"][-1], 1e-9)
+    exponent = _growth_exponent(spec["sizes"], report["timings"])
+    report["slowdown"] = slowdown
+    report["exponent"] = exponent
+    report["ok"] = (max_slowdown is None or slowdown <= max_slowdown) and (
+        max_exponent is None or exponent <= max_exponent
+    )
+    return report
+
+
+def _profiled(fn, solution_file):
+    import cProfile
+
+    profiler = cProfile.Profile()
+    line_stats = {}
+    last_lines = {}
+
+    def trace_lines(frame, event, _arg):
+        key = id(frame)
+        now = time.perf_counter()
+        previous = last_lines.get(key)
+        if previous is not None:
+            stat = line_stats.setdefault(previous[0], [0, 0.0])
+            stat[0] += 1
+            stat[1] += now - previous[1]
+        if event == "return":
+            last_lines.pop(key, None)
+        elif event == "line":
+            last_lines[key] = (frame.f_lineno, now)
+        return trace_lines
+
+    def trace_calls(frame, _event, _arg):
+        if frame.f_code.co_filename != solution_file:
+            return None
+        return trace_lines
+
+    def wrapped(*args):
+        sys.settrace(trace_calls)
+        profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            profiler.disable()
+            sys.settrace(None)
+
+    return wrapped, profiler, line_stats
+
 
+def _profile_report(profiler, line_stats, source_lines, top):
+    import pstats
 
-def _is_equal(actual, expected, precision):
-    return _normalize(actual, precision) == _normalize(expected, precision)
+    functions = []
+    stats = pstats.Stats(profiler).stats
+    for (filename, lineno, name), (primitive, calls, own, cumulative, _callers) in stats.items():
+        if "_lsprof.Profiler" in name:
+            continue
+        functions.append(
+            {
+                "function": name[:120],
+                "file": os.path.basename(filename)[:120],
+                "line": lineno,
+                "calls": calls,
+                "primitiveCalls": primitive,
+                "totalTime": own,
+                "cumulativeTime": cumulative,
+            }
+        )
+    functions.sort(key=lambda row: row["cumulativeTime"], reverse=True)
+    lines = sorted(line_stats.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return {
+        "functions": functions[:top],
+        "lines": [
+            {
+                "line": lineno,
+                "hits": hits,
+                "time": elapsed,
+                "code": source_lines[lineno - 1].strip()[:120] if 0 < lineno <= len(source_lines) else "",
+            }
+            for lineno, (hits, elapsed) in lines
+        ],
+    }
 
 
 def main():
-    with open("cases.json", "r", encoding="utf-8") as handle:
-        payload = json.load(handle)
+    limit_applied = _apply_limits()
+    _disable_network()
+
+    line = sys.stdin.readline()
+    if not line:
+        return
+    payload = json.loads(line)
+    started = time.monotonic()
+    if payload.get("workdir"):
+        os.chdir(payload["workdir"])
 
     entry = payload["entry"]
-    tests = payload["tests"]
+    total = payload["total"]
     precision = payload.get("precision", 4)
+    abs_tol = payload.get("abs_tol", 10.0 ** -precision)
+    rel_tol = payload.get("rel_tol", 0.0)
+    time_limit = payload.get("time_limit") or 0
+    case_time_limit = payload.get("case_time_limit") or time_limit
+    fail_fast = payload.get("fail_fast", False)
+    deadline = started + time_limit if time_limit else None
 
-    limit_applied = _apply_limits()
-    _disable_network()
+    channel = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    signal.signal(signal.SIGALRM, _on_alarm)
 
-    module = _load_solution()
+    def emit(message):
+        channel.write(json.dumps(message, default=_to_json) + "\\n")
+        channel.flush()
+
+    def remaining():
+        return None if deadline is None else deadline - time.monotonic()
+
+    try:
+        if deadline is not None:
+            _arm(remaining())
+        try:
+            module = _load_solution(payload["code"])
+        finally:
+            _disarm()
+    except _CaseTimeout:
+        emit(
+            {
+                "event": "summary",
+                "status": "timeout",
+                "passed": 0,
+                "failed": total,
+                "total": total,
+                "error": "Time limit exceeded while loading solution",
+                "limitApplied": limit_applied,
+            }
+        )
+        return
     fn = getattr(module, entry)
+    call = fn
+    profile = payload.get("profile")
+    if profile:
+        call, profiler, line_stats = _profiled(fn, module.__file__)
 
-    cases = []
     passed = 0
+    timed_out = False
+    stop = False
+    cpu_total = 0.0
 
-    for case in tests:
+    for index, case in enumerate(_read_cases()):
         args = case.get("args", [])
         expected = case.get("expected")
-        try:
-            output = fn(*args)
-            ok = _is_equal(output, expected, precision)
-            if ok:
-                passed += 1
-            cases.append(
-                {
-                    "ok": ok,
-                    "args": args,
-                    "expected": expected,
-                    "output": output,
-                }
-            )
-        except Exception:
-            cases.append(
+        left = remaining()
+        if stop or (left is not None and left <= 0):
+            stop = True
+            emit(
                 {
+                    "event": "case",
+                    "index": index,
                     "ok": False,
                     "args": args,
                     "expected": expected,
                     "output": None,
-                    "error": traceback.format_exc(),
+                    "skipped": True,
                 }
             )
-
-    result = {
-        "status": "ok",
+            continue
+        budget = case_time_limit if left is None else min(case_time_limit or left, left)
+        usage = None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            if budget:
+                _arm(budget)
+            try:
+                output = call(*args)
+            finally:
+                _disarm()
+                usage = (time.process_time() - cpu_start, time.perf_counter() - wall_start)
+            ok = _is_close(output, expected, abs_tol, rel_tol)
+            if ok:
+                passed += 1
+            record = {
+                "ok": ok,
+                "args": args,
+                "expected": expected,
+                "output": output,
+            }
+        except _CaseTimeout:
+            timed_out = True
+            record = {
+                "ok": False,
+                "args": args,
+                "expected": expected,
+                "output": None,
+                "timeout": True,
+                "error": "Case time limit exceeded",
+            }
+        except Exception:
+            record = {
+                "ok": False,
+                "args": args,
+                "expected": expected,
+                "output": None,
+                "error": traceback.format_exc(),
+            }
+        if case.get("hidden"):
+            record = {key: value for key, value in record.items() if key not in ("args", "expected", "output")}
+            record["hidden"] = True
+            if "error" in record and not record.get("timeout"):
+                record["error"] = record["error"].strip().splitlines()[-1]
+        if usage is None:
+            usage = (time.process_time() - cpu_start, time.perf_counter() - wall_start)
+        cpu_total += usage[0]
+        record["cpuTime"] = usage[0]
+        record["wallTime"] = usage[1]
+        record["peakMemoryKb"] = _peak_memory_kb()
+        emit({"event": "case", "index": index, **record})
+        if fail_fast and not record["ok"]:
+            stop = True
+
+    summary = {
+        "event": "summary",
+        "status": "timeout" if timed_out else "ok",
         "passed": passed,
-        "failed": len(tests) - passed,
-        "total": len(tests),
-        "cases": cases,
+        "failed": total - passed,
+        "total": total,
         "limitApplied": limit_applied,
+        "cpuTime": cpu_total,
     }
-    print(json.dumps(result))
+    if profile:
+        source_lines = payload["code"].splitlines()
+        summary["profile"] = _profile_report(profiler, line_stats, source_lines, profile["top"])
+    performance = payload.get("performance")
+    if performance:
+        if passed == total:
+            summary["performance"] = _check_performance(fn, entry, performance, remaining())
+        else:
+            summary["performance"] = {"ok": False, "skipped": True}
+
+    sys.stdout.flush()
+    summary["peakMemoryKb"] = _peak_memory_kb()
+    emit(summary)
 
 
 if __name__ == "__main__":
@@ -136,70 +502,345 @@ if __name__ == "__main__":
 RUNNER_SOURCE = RUNNER_SOURCE.replace("__MEMORY_LIMIT__", str(MEMORY_LIMIT_BYTES))
 
 
-def run_problem(problem: Problem, code: str, run_all: bool) -> dict[str, Any]:
-    tests = problem["tests"] if run_all else problem["tests"][: problem["run_count"]]
-    payload = {
-        "entry": problem["spec"]["entry"],
-        "tests": tests,
-        "precision": problem["spec"]["precision"],
+RUNNER_MODULE = "judge_runner"
+RUNNER_BOOTSTRAP = (
+    "import sys; sys.path.insert(0, sys.argv[1]); "
+    f"import {RUNNER_MODULE}; {RUNNER_MODULE}.main()"
+)
+
+_runner_dir: Optional[str] = None
+_runner_lock = threading.Lock()
+
+
+def _runner_home() -> str:
+    global _runner_dir
+    with _runner_lock:
+        if _runner_dir is None:
+            home = Path(tempfile.mkdtemp(prefix="paper-judge-"))
+            module_path = home / f"{RUNNER_MODULE}.py"
+            module_path.write_text(RUNNER_SOURCE, encoding="utf-8")
+            py_compile.compile(str(module_path), doraise=True)
+            (home / "cwd").mkdir()
+            for path in sorted(home.rglob("*"), reverse=True):
+                path.chmod(0o555 if path.is_dir() else 0o444)
+            home.chmod(0o555)
+            atexit.register(_remove_runner_home, str(home))
+            _runner_dir = str(home)
+    return _runner_dir
+
+
+def _remove_runner_home(home: str) -> None:
+    for root, dirs, _files in os.walk(home):
+        os.chmod(root, 0o755)
+        for name in dirs:
+            os.chmod(os.path.join(root, name), 0o755)
+    shutil.rmtree(home, ignore_errors=True)
+
+
+def _spawn_runner() -> subprocess.Popen:
+    home = _runner_home()
+    return subprocess.Popen(
+        ["python3", "-I", "-c", RUNNER_BOOTSTRAP, home],
+        cwd=os.path.join(home, "cwd"),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+def _discard(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.kill()
+    process.communicate()
+
+
+@dataclass
+class _Worker:
+    process: subprocess.Popen
+    started: float
+
+
+class RunnerPool:
+    def __init__(self, size: int = POOL_SIZE, max_idle_sec: float = POOL_MAX_IDLE_SEC):
+        self.size = size
+        self.max_idle_sec = max_idle_sec
+        self._idle: deque[_Worker] = deque()
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        with self._lock:
+            self._fill()
+
+    def acquire(self) -> subprocess.Popen:
+        worker: Optional[_Worker] = None
+        stale: list[_Worker] = []
+        with self._lock:
+            now = time.monotonic()
+            while self._idle:
+                candidate = self._idle.popleft()
+                if candidate.process.poll() is None and now - candidate.started <= self.max_idle_sec:
+                    worker = candidate
+                    break
+                stale.append(candidate)
+            self._fill()
+        for candidate in stale:
+            _discard(candidate.process)
+        if worker is None:
+            return _spawn_runner()
+        return worker.process
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._idle)
+            self._idle.clear()
+        for worker in workers:
+            _discard(worker.process)
+
+    def _fill(self) -> None:
+        while len(self._idle) < self.size:
+            self._idle.append(_Worker(_spawn_runner(), time.monotonic()))
+
+
+_pool: Optional[RunnerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> RunnerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RunnerPool()
+        return _pool
+
+
+def configure_pool(size: int = POOL_SIZE, max_idle_sec: float = POOL_MAX_IDLE_SEC) -> RunnerPool:
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, RunnerPool(size=size, max_idle_sec=max_idle_sec)
+        pool = _pool
+    if previous is not None:
+        previous.shutdown()
+    return pool
+
+
+def _shutdown_pool() -> None:
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.shutdown()
+
+
+atexit.register(_shutdown_pool)
+
+
+def _summary(
+    status: str,
+    total: int,
+    queue_wait: float,
+    exec_time: float,
+    output: str,
+    error: str,
+    passed: int = 0,
+) -> dict[str, Any]:
+    return {
+        "event": "summary",
+        "status": status,
+        "passed": passed,
+        "failed": total - passed,
+        "total": total,
+        "duration": queue_wait + exec_time,
+        "output": output,
+        "error": error,
+        "queueWait": queue_wait,
+        "execTime": exec_time,
     }
 
-    with tempfile.TemporaryDirectory() as workdir:
-        work_path = Path(workdir)
-        (work_path / "solution.py").write_text(code, encoding="utf-8")
-        (work_path / "cases.json").write_text(json.dumps(payload), encoding="utf-8")
-        (work_path / "runner.py").write_text(RUNNER_SOURCE, encoding="utf-8")
 
-        start = time.time()
-        try:
-            completed = subprocess.run(
-                ["python3", "-I", "runner.py"],
-                cwd=workdir,
-                capture_output=True,
-                text=True,
-                timeout=problem["spec"]["time_limit_sec"],
-            )
-        except subprocess.TimeoutExpired:
-            return {
-                "status": "timeout",
-                "passed": 0,
-                "failed": len(tests),
-                "total": len(tests),
-                "duration": problem["spec"]["time_limit_sec"],
-                "output": "",
-                "error": "Time limit exceeded",
-                "cases": [],
-            }
+@contextmanager
+def _scratch_dir(needed: bool) -> Iterator[Optional[str]]:
+    if not needed:
+        yield None
+        return
+    with tempfile.TemporaryDirectory(prefix="paper-judge-job-", dir=SCRATCH_ROOT) as workdir:
+        yield workdir
 
-        duration = time.time() - start
 
-        if completed.returncode != 0:
-            return {
-                "status": "error",
-                "passed": 0,
-                "failed": len(tests),
-                "total": len(tests),
-                "duration": duration,
-                "output": completed.stdout,
-                "error": completed.stderr,
-                "cases": [],
-            }
+def serialize_cases(tests: Iterable[Any]) -> list[str]:
+    return [json.dumps(case) + "\n" for case in tests]
 
-        try:
-            result = json.loads(completed.stdout.strip())
-        except json.JSONDecodeError:
-            return {
-                "status": "error",
-                "passed": 0,
-                "failed": len(tests),
-                "total": len(tests),
-                "duration": duration,
-                "output": completed.stdout,
-                "error": "Invalid runner output",
-                "cases": [],
-            }
 
-        result["duration"] = duration
-        result.setdefault("output", completed.stdout)
-        result.setdefault("error", "")
-        return result
+def select_tests(problem: Problem, run_all: bool) -> list[Any]:
+    return problem["tests"] if run_all else problem["tests"][: problem["run_count"]]
+
+
+@dataclass(frozen=True)
+class PreparedCases:
+    inline: list[str]
+    generated: Optional[Path] = None
+    generated_count: int = 0
+
+    def __len__(self) -> int:
+        return len(self.inline) + self.generated_count
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.inline
+        if self.generated is not None:
+            with self.generated.open(encoding="utf-8") as handle:
+                yield from handle
+
+
+def prepare_cases(problem: Problem, run_all: bool) -> PreparedCases:
+    inline = serialize_cases(select_tests(problem, run_all))
+    generator = problem.get("generated")
+    if not run_all or generator is None:
+        return PreparedCases(inline)
+    path = generated_cases_path(generator, problem["spec"]["entry"])
+    return PreparedCases(inline, path, generator["count"])
+
+
+def _feed(process: subprocess.Popen, header: dict[str, Any], case_lines: Iterable[str]) -> None:
+    try:
+        process.stdin.write(json.dumps(header) + "\n")
+        for line in case_lines:
+            process.stdin.write(line)
+        process.stdin.close()
+    except (BrokenPipeError, ValueError):
+        pass
+
+
+def stream_problem(
+    problem: Problem,
+    code: str,
+    run_all: bool,
+    fail_fast: bool = False,
+    profile: bool = False,
+    cases: Optional[PreparedCases] = None,
+) -> Iterator[dict[str, Any]]:
+    spec = problem["spec"]
+    if cases is None:
+        cases = prepare_cases(problem, run_all)
+    total = len(cases)
+    time_limit = spec["time_limit_sec"]
+    header: dict[str, Any] = {
+        "entry": spec["entry"],
+        "code": code,
+        "total": total,
+        "precision": spec["precision"],
+        "abs_tol": spec.get("abs_tol", 10.0 ** -spec["precision"]),
+        "rel_tol": spec.get("rel_tol", 0.0),
+        "time_limit": time_limit,
+        "case_time_limit": spec.get("case_time_limit_sec", time_limit),
+        "fail_fast": fail_fast,
+    }
+    if run_all and "performance" in spec:
+        header["performance"] = spec["performance"]
+    if profile:
+        header["profile"] = {"top": PROFILE_TOP}
+
+    with _scratch_dir(spec.get("needs_workdir", False)) as workdir:
+        header["workdir"] = workdir
+
+        queued = time.monotonic()
+        process = get_pool().acquire()
+        start = time.monotonic()
+        queue_wait = start - queued
+
+        timed_out = threading.Event()
+
+        def expire() -> None:
+            timed_out.set()
+            process.kill()
+
+        stderr_chunks: list[str] = []
+        drain = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        feeder = threading.Thread(target=_feed, args=(process, header, cases), daemon=True)
+        timer = threading.Timer(time_limit + WATCHDOG_GRACE_SEC, expire)
+        drain.start()
+        feeder.start()
+        timer.start()
+
+        summary: Optional[dict[str, Any]] = None
+        stray: list[str] = []
+        passed = 0
+        try:
+            for line in process.stdout:
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    stray.append(line)
+                    continue
+                event = message.get("event") if isinstance(message, dict) else None
+                if event == "case":
+                    passed += bool(message.get("ok"))
+                    yield message
+                elif event == "summary":
+                    summary = message
+                else:
+                    stray.append(line)
+            process.wait()
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            feeder.join()
+            drain.join()
+
+        exec_time = time.monotonic() - start
+        stderr = "".join(stderr_chunks)
+
+        if timed_out.is_set():
+            yield _summary("timeout", total, queue_wait, exec_time, stderr, "Time limit exceeded", passed)
+            return
+
+        if process.returncode != 0:
+            summary = _summary("error", total, queue_wait, exec_time, "".join(stray), stderr, passed)
+            # Negative codes mean the runner was killed by a signal, not that the code raised.
+            summary["exitCode"] = process.returncode
+            yield summary
+            return
+
+        if summary is None:
+            yield _summary(
+                "error", total, queue_wait, exec_time, "".join(stray), "Invalid runner output", passed
+            )
+            return
+
+        summary["duration"] = queue_wait + exec_time
+        summary["queueWait"] = queue_wait
+        summary["execTime"] = exec_time
+        summary["output"] = stderr
+        summary.setdefault("error", "")
+        yield summary
+
+
+def collect_result(messages: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    cases: list[dict[str, Any]] = []
+    summary: dict[str, Any] = {}
+    for message in messages:
+        message = dict(message)
+        if message.pop("event") == "case":
+            message.pop("index", None)
+            cases.append(message)
+        else:
+            summary = message
+    summary["cases"] = cases
+    return summary
+
+
+def run_problem(
+    problem: Problem,
+    code: str,
+    run_all: bool,
+    fail_fast: bool = False,
+    profile: bool = False,
+    cases: Optional[PreparedCases] = None,
+) -> dict[str, Any]:
+    return collect_result(
+        stream_problem(problem, code, run_all, fail_fast=fail_fast, profile=profile, cases=cases)
+    )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Optional
+
+CRAWL_MAX_BYTES = int(os.getenv("CRAWL_MAX_BYTES", str(2 * 1024 * 1024)))
+CRAWL_MAX_PARAGRAPHS = int(os.getenv("CRAWL_MAX_PARAGRAPHS", "12"))
+# Large chunks are fed in slices so parsing stops soon after ``done``.
+FEED_BYTES = 16 * 1024
+MAX_TITLE_CHARS = 1024
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+# Block-level tags that implicitly close an open <p>.
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "div", "dl", "fieldset", "figure",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li",
+    "main", "nav", "ol", "p", "pre", "section", "table", "ul",
+}
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ParagraphParser(HTMLParser):
+    """Collects the page title and up to ``max_paragraphs`` non-empty <p> texts.
+
+    Entities are decoded by HTMLParser, script/style content is dropped, and
+    ``done`` turns true as soon as enough paragraphs have been seen so the
+    caller can stop feeding input.
+    """
+
+    def __init__(self, max_paragraphs: int = CRAWL_MAX_PARAGRAPHS):
+        super().__init__(convert_charrefs=True)
+        self.max_paragraphs = max_paragraphs
+        self.title: Optional[str] = None
+        self.paragraphs: list[str] = []
+        self._title_parts: Optional[list[str]] = None
+        self._title_chars = 0
+        self._paragraph: Optional[list[str]] = None
+        self._skip_depth = 0
+
+    @property
+    def done(self) -> bool:
+        return len(self.paragraphs) >= self.max_paragraphs
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag == "title" and self.title is None and self._skip_depth == 0:
+            self._title_parts = []
+            self._title_chars = 0
+        elif tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._close_paragraph()
+            if tag == "p":
+                self._paragraph = []
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        if tag in BLOCK_TAGS:
+            self._close_paragraph()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title" and self._title_parts is not None:
+            self.title = _WHITESPACE.sub(" ", "".join(self._title_parts)).strip()[:MAX_TITLE_CHARS]
+            self._title_parts = None
+        elif tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._close_paragraph()
+
+    def handle_data(self, data: str) -> None:
+        if self._title_parts is not None:
+            if self._title_chars < MAX_TITLE_CHARS:
+                self._title_parts.append(data)
+                self._title_chars += len(data)
+        elif self._skip_depth == 0 and self._paragraph is not None:
+            self._paragraph.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._close_paragraph()
+
+    def _close_paragraph(self) -> None:
+        if self._paragraph is None:
+            return
+        text = _WHITESPACE.sub(" ", "".join(self._paragraph)).strip()
+        self._paragraph = None
+        if text and not self.done:
+            self.paragraphs.append(text)
+
+
+def extract_html(
+    chunks: Iterable[bytes],
+    encoding: Optional[str] = None,
+    max_paragraphs: int = CRAWL_MAX_PARAGRAPHS,
+    max_bytes: int = CRAWL_MAX_BYTES,
+) -> tuple[Optional[str], list[str]]:
+    """Parse HTML from byte chunks, stopping early once the paragraphs are in."""
+    decoder = codecs.getincrementaldecoder(_codec(encoding))(errors="replace")
+    parser = ParagraphParser(max_paragraphs)
+    consumed = 0
+    for chunk in chunks:
+        for offset in range(0, len(chunk), FEED_BYTES):
+            piece = chunk[offset : offset + min(FEED_BYTES, max_bytes - consumed)]
+            consumed += len(piece)
+            parser.feed(decoder.decode(piece))
+            if parser.done or consumed >= max_bytes:
+                parser.close()
+                return parser.title, parser.paragraphs
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return parser.title, parser.paragraphs
+
+
+def _codec(encoding: Optional[str]) -> str:
+    try:
+        return codecs.lookup(encoding or "utf-8").name
+    except LookupError:
+        return "utf-8"
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .problems import Problem
+from .verdict_cache import run_cached
+
+JUDGE_CONCURRENCY = int(os.getenv("JUDGE_CONCURRENCY", str(os.cpu_count() or 2)))
+JUDGE_MAX_PENDING = int(os.getenv("JUDGE_MAX_PENDING", "256"))
+JUDGE_MAX_FINISHED = int(os.getenv("JUDGE_MAX_FINISHED", "1024"))
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+@dataclass
+class JudgeJob:
+    id: str
+    problem_id: str
+    run_all: bool
+    future: Future = field(repr=False)
+    fail_fast: bool = False
+    status: str = "queued"
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def result(self) -> Optional[dict[str, Any]]:
+        if not self.future.done():
+            return None
+        return self.future.result()
+
+
+class JudgeQueue:
+    def __init__(
+        self,
+        concurrency: int = JUDGE_CONCURRENCY,
+        max_pending: int = JUDGE_MAX_PENDING,
+        max_finished: int = JUDGE_MAX_FINISHED,
+    ):
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="judge")
+        self._jobs: OrderedDict[str, JudgeJob] = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, problem: Problem, code: str, run_all: bool, fail_fast: bool = False) -> JudgeJob:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError("Judge queue is full")
+            self._pending += 1
+            job = JudgeJob(
+                id=uuid.uuid4().hex,
+                problem_id=problem["id"],
+                run_all=run_all,
+                future=Future(),
+                fail_fast=fail_fast,
+            )
+            self._jobs[job.id] = job
+            self._evict_finished()
+        self._executor.submit(self._run, job, problem, code)
+        return job
+
+    def get(self, job_id: str) -> Optional[JudgeJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: JudgeJob, problem: Problem, code: str) -> None:
+        job.status = "running"
+        job.started = time.time()
+        try:
+            result = run_cached(problem, code, run_all=job.run_all, fail_fast=job.fail_fast)
+        except Exception as exc:
+            result = {
+                "status": "error",
+                "passed": 0,
+                "failed": 0,
+                "total": 0,
+                "duration": 0.0,
+                "output": "",
+                "error": f"Judge failure: {exc}",
+                "cases": [],
+            }
+        result["queueWait"] = (job.started - job.created) + (result.get("queueWait") or 0.0)
+        job.finished = time.time()
+        job.status = "done"
+        with self._lock:
+            self._pending -= 1
+        job.future.set_result(result)
+
+    def _evict_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status == "done"]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+_queue: Optional[JudgeQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JudgeQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JudgeQueue()
+        return _queue
+
+
+def shutdown_queue() -> None:
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.shutdown()
@@ -1,36 +1,87 @@
+import asyncio
+import json
 from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Iterator, Literal, Optional
 
 import httpx
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter
 
-from .crawler import PaperCrawler
-from .data import load_sample_papers
+from .crawl_queue import CrawlJob, CrawlWorker, enqueue_crawl, get_crawl_job
+from .crawler import BatchCrawler, PaperCrawler
+from .data import sync_sample_papers
 from .database import (
+    close_db_pool,
     fetch_paper,
+    get_db_pool,
     init_db,
+    list_changes,
+    list_paper_fields,
     list_papers as fetch_all_papers,
+    paper_version,
+    search_papers,
     upsert_papers,
 )
-from .evaluator import run_problem
-from .models import Paper
-from .problems import get_problem
-from .schemas import RunRequest, RunResponse
+from .evaluator import get_pool
+from .judge_queue import JudgeJob, QueueFullError, get_queue, shutdown_queue
+from .models import Paper, PaperChanges, SearchResults
+from .problems import Problem, get_problem, problems_for_paper, public_problem
+from .regrade import RegradeSummary, iter_regrade
+from .response_cache import CachedBody, get_response_cache
+from .schemas import JobResponse, RegradeRequest, RunRequest, RunResponse
+from .verdict_cache import run_cached, stream_cached
+
+MAX_JOB_WAIT_SEC = 30.0
+MAX_PAGE_SIZE = 500
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_CHANGES_PAGE_SIZE = 500
+MAX_CRAWL_BATCH = 500
+CRAWL_UPSERT_CHUNK = 20
+_PAPER_LIST = TypeAdapter(list[Paper])
+
 
 class CrawlRequest(BaseModel):
     url: str
     topic: str
+    background: bool = False
+
+
+class CrawlJobResponse(BaseModel):
+    jobId: str
+    url: str
+    topic: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int
+    maxAttempts: int
+    nextAttemptAt: Optional[float] = None
+    error: Optional[str] = None
+    paperId: Optional[str] = None
+
+
+class CrawlBatchRequest(BaseModel):
+    urls: list[str] = Field(..., min_length=1, max_length=MAX_CRAWL_BATCH)
+    topic: str
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
-    upsert_papers(load_sample_papers())
+    get_response_cache().track(paper_version)
+    sync_sample_papers()
+    get_pool().warm()
+    crawl_worker.start()
     yield
+    crawl_worker.stop()
+    await batch_crawler.aclose()
+    shutdown_queue()
+    close_db_pool()
 
 
 app = FastAPI(title="Paper Swipe API", version="0.1.0", lifespan=lifespan)
 crawler = PaperCrawler()
+batch_crawler = BatchCrawler(crawler)
+crawl_worker = CrawlWorker(crawler)
 
 
 @app.get("/health", tags=["meta"])
@@ -38,48 +89,305 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/db", tags=["meta"])
+def db_health() -> dict[str, Any]:
+    return get_db_pool().stats()
+
+
 @app.get("/papers", response_model=list[Paper], tags=["papers"])
-def list_papers_endpoint() -> list[Paper]:
-    return fetch_all_papers()
+def list_papers_endpoint(
+    request: Request,
+    topic: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+) -> Any:
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    key = ("papers", topic, cursor, limit, tuple(selected) if selected else None)
+    try:
+        cached = get_response_cache().get_or_build(
+            key, lambda: _build_paper_page(topic, cursor, limit, selected)
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _cached_response(request, key, cached)
+
+
+@app.get("/papers/changes", response_model=PaperChanges, tags=["papers"])
+def list_paper_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_CHANGES_PAGE_SIZE),
+) -> PaperChanges:
+    papers, deleted, cursor, has_more = list_changes(since, limit)
+    return PaperChanges(since=since, cursor=cursor, has_more=has_more, papers=papers, deleted=deleted)
+
+
+@app.get("/search", response_model=SearchResults, tags=["papers"])
+def search_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+) -> SearchResults:
+    total, hits = search_papers(q, limit=limit, offset=offset)
+    return SearchResults(query=q, total=total, limit=limit, offset=offset, results=hits)
 
 
 @app.get("/papers/{paper_id}", response_model=Paper, tags=["papers"])
-def get_paper(paper_id: str) -> Paper:
-    paper = fetch_paper(paper_id)
-    if paper is None:
+def get_paper(request: Request, paper_id: str) -> Any:
+    key = ("paper", paper_id)
+    cached = get_response_cache().get_or_build(key, lambda: _build_paper(paper_id))
+    if cached is None:
         raise HTTPException(status_code=404, detail="Paper not found")
-    return paper
+    return _cached_response(request, key, cached)
+
 
+@app.get("/papers/{paper_id}/problems", tags=["problems"])
+def list_paper_problems(paper_id: str) -> list[dict[str, Any]]:
+    problems = problems_for_paper(paper_id)
+    if not problems and fetch_paper(paper_id) is None:
+        raise HTTPException(status_code=404, detail="Paper not found")
+    return [public_problem(problem) for problem in problems]
 
-@app.post("/crawl", response_model=Paper, tags=["crawler"])
-def crawl_paper(request: CrawlRequest) -> Paper:
+
+@app.post(
+    "/crawl",
+    response_model=Paper,
+    responses={202: {"model": CrawlJobResponse}},
+    tags=["crawler"],
+)
+def crawl_paper(request: CrawlRequest, response: Response) -> Any:
+    if request.background:
+        job = enqueue_crawl(request.url, request.topic)
+        crawl_worker.wake()
+        return JSONResponse(_crawl_job_response(job).model_dump(), status_code=202)
     try:
-        paper = crawler.crawl(request.url, request.topic)
+        result = crawler.fetch(request.url, request.topic)
     except httpx.HTTPError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    upsert_papers([paper])
+    paper = result.paper
+    if not result.cached or fetch_paper(paper.id) is None:
+        duplicate_of = upsert_papers([paper]).get(paper.id)
+        if duplicate_of is not None:
+            response.headers["X-Duplicate-Of"] = duplicate_of
+            paper = fetch_paper(duplicate_of) or paper
+    response.headers["X-Crawl-Cache"] = "hit" if result.cached else "miss"
     return paper
 
 
-@app.post("/api/run", response_model=RunResponse, tags=["judge"])
-def run_endpoint(payload: RunRequest) -> RunResponse:
+@app.get("/crawl/jobs/{job_id}", response_model=CrawlJobResponse, tags=["crawler"])
+def get_crawl_job_endpoint(job_id: str) -> CrawlJobResponse:
+    job = get_crawl_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _crawl_job_response(job)
+
+
+def _crawl_job_response(job: CrawlJob) -> CrawlJobResponse:
+    return CrawlJobResponse(
+        jobId=job.id,
+        url=job.url,
+        topic=job.topic,
+        status=job.status,
+        attempts=job.attempts,
+        maxAttempts=job.max_attempts,
+        nextAttemptAt=job.next_attempt_at if job.status == "queued" else None,
+        error=job.last_error,
+        paperId=job.paper_id,
+    )
+
+
+async def _crawl_batch_stream(request: CrawlBatchRequest) -> AsyncIterator[str]:
+    summary = {"total": 0, "stored": 0, "duplicates": 0, "failed": 0}
+    pending: list[tuple[str, Paper, bool]] = []
+
+    async def flush() -> list[str]:
+        papers = [paper for _, paper, _ in pending]
+        duplicates = await asyncio.to_thread(upsert_papers, papers)
+        summary["stored"] += len(papers) - len(duplicates)
+        summary["duplicates"] += len(duplicates)
+        lines = []
+        for url, paper, cached in pending:
+            result = {"url": url, "status": "ok", "id": duplicates.get(paper.id, paper.id), "cached": cached}
+            if paper.id in duplicates:
+                result["status"] = "duplicate"
+            lines.append(json.dumps(result, ensure_ascii=False) + "\n")
+        pending.clear()
+        return lines
+
+    async for outcome in batch_crawler.crawl_many(request.urls, request.topic):
+        summary["total"] += 1
+        if outcome.paper is None:
+            summary["failed"] += 1
+            result = {"url": outcome.url, "status": "error", "error": outcome.error}
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+            continue
+        pending.append((outcome.url, outcome.paper, outcome.cached))
+        if len(pending) >= CRAWL_UPSERT_CHUNK:
+            for line in await flush():
+                yield line
+    if pending:
+        for line in await flush():
+            yield line
+    yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+
+
+@app.post("/crawl/batch", tags=["crawler"])
+async def crawl_batch(request: CrawlBatchRequest) -> StreamingResponse:
+    return StreamingResponse(_crawl_batch_stream(request), media_type="application/x-ndjson")
+
+
+def _build_paper_page(
+    topic: Optional[str],
+    cursor: Optional[str],
+    limit: Optional[int],
+    fields: Optional[list[str]],
+) -> tuple[bytes, dict[str, str]]:
+    fetch_limit = limit + 1 if limit else None
+    if fields:
+        rows = list_paper_fields(fields, topic=topic, after=cursor, limit=fetch_limit)
+        rows, next_cursor = _paginate(rows, limit, lambda row: row["id"])
+        body = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    else:
+        papers = fetch_all_papers(topic=topic, after=cursor, limit=fetch_limit)
+        papers, next_cursor = _paginate(papers, limit, lambda paper: paper.id)
+        body = _PAPER_LIST.dump_json(papers)
+    return body, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+
+def _build_paper(paper_id: str) -> Optional[tuple[bytes, dict[str, str]]]:
+    paper = fetch_paper(paper_id)
+    if paper is None:
+        return None
+    return paper.model_dump_json().encode("utf-8"), {}
+
+
+def _cached_response(request: Request, key: Any, cached: CachedBody) -> Response:
+    encoding = cached.encoding_for(request.headers.get("accept-encoding"))
+    headers = {**cached.headers, "ETag": cached.etag_for(encoding), "Vary": "Accept-Encoding"}
+    if cached.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    body = get_response_cache().encoded(key, cached, encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _paginate(items: list[Any], limit: Optional[int], key: Any) -> tuple[list[Any], Optional[str]]:
+    if limit is None or len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, key(items[-1])
+
+
+def _resolve_problem(payload: RunRequest) -> Problem:
     try:
         problem = get_problem(payload.problem_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Problem not found")
     if problem["paper_id"] != payload.paper_id:
         raise HTTPException(status_code=404, detail="Problem not found")
-    result = run_problem(problem, payload.code, run_all=False)
+    return problem
+
+
+def _job_response(job: JudgeJob) -> JobResponse:
+    # The worker marks the job done just before it publishes the result, so
+    # report "done" only once the result is there for the client to read.
+    result = job.result
+    status = job.status
+    if result is not None:
+        status = "done"
+    elif status == "done":
+        status = "running"
+    return JobResponse(
+        jobId=job.id,
+        status=status,
+        result=RunResponse(**result) if result is not None else None,
+    )
+
+
+@app.post("/api/run", response_model=RunResponse, tags=["judge"])
+def run_endpoint(payload: RunRequest) -> RunResponse:
+    problem = _resolve_problem(payload)
+    result = run_cached(
+        problem, payload.code, run_all=False, fail_fast=payload.fail_fast, profile=payload.profile
+    )
     return RunResponse(**result)
 
 
 @app.post("/api/submit", response_model=RunResponse, tags=["judge"])
 def submit_endpoint(payload: RunRequest) -> RunResponse:
-    try:
-        problem = get_problem(payload.problem_id)
-    except KeyError:
-        raise HTTPException(status_code=404, detail="Problem not found")
-    if problem["paper_id"] != payload.paper_id:
-        raise HTTPException(status_code=404, detail="Problem not found")
-    result = run_problem(problem, payload.code, run_all=True)
+    problem = _resolve_problem(payload)
+    result = run_cached(problem, payload.code, run_all=True, fail_fast=payload.fail_fast)
     return RunResponse(**result)
+
+
+def _event_stream(messages: Iterable[dict[str, Any]]) -> Iterator[str]:
+    for message in messages:
+        data = {key: value for key, value in message.items() if key != "event"}
+        yield f"event: {message['event']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _stream_response(payload: RunRequest, problem: Problem, run_all: bool) -> StreamingResponse:
+    messages = stream_cached(
+        problem,
+        payload.code,
+        run_all=run_all,
+        fail_fast=payload.fail_fast,
+        profile=payload.profile and not run_all,
+    )
+    return StreamingResponse(
+        _event_stream(messages),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/run/stream", tags=["judge"])
+def run_stream_endpoint(payload: RunRequest) -> StreamingResponse:
+    problem = _resolve_problem(payload)
+    return _stream_response(payload, problem, run_all=False)
+
+
+@app.post("/api/submit/stream", tags=["judge"])
+def submit_stream_endpoint(payload: RunRequest) -> StreamingResponse:
+    problem = _resolve_problem(payload)
+    return _stream_response(payload, problem, run_all=True)
+
+
+@app.post("/api/submit/jobs", response_model=JobResponse, status_code=202, tags=["judge"])
+async def submit_job_endpoint(payload: RunRequest) -> JobResponse:
+    problem = _resolve_problem(payload)
+    try:
+        job = get_queue().submit(problem, payload.code, run_all=True, fail_fast=payload.fail_fast)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return _job_response(job)
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse, tags=["judge"])
+async def get_job_endpoint(
+    job_id: str, wait: float = Query(0.0, ge=0.0, le=MAX_JOB_WAIT_SEC)
+) -> JobResponse:
+    job = get_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if wait > 0 and not job.future.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout=wait)
+        except asyncio.TimeoutError:
+            pass
+    return _job_response(job)
+
+
+def _regrade_stream(request: RegradeRequest) -> Iterator[str]:
+    summary = RegradeSummary()
+    submissions = [submission.model_dump() for submission in request.submissions]
+    for result in iter_regrade(submissions, run_all=request.run_all):
+        summary.add(result)
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+    yield json.dumps({"summary": summary.to_dict()}, ensure_ascii=False) + "\n"
+
+
+@app.post("/api/regrade", tags=["judge"])
+def regrade_endpoint(request: RegradeRequest) -> StreamingResponse:
+    return StreamingResponse(_regrade_stream(request), media_type="application/x-ndjson")
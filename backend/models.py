@@ -1,6 +1,6 @@
-from typing import List, Literal, Union
+from typing import Annotated, List, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 CardType = Literal["hook", "intuition", "method", "tradeoff", "who", "source"]
@@ -39,7 +39,10 @@ class SourceCard(BaseModel):
     url: str
 
 
-Card = Union[HookCard, IntuitionCard, MethodCard, TradeoffCard, WhoCard, SourceCard]
+Card = Annotated[
+    Union[HookCard, IntuitionCard, MethodCard, TradeoffCard, WhoCard, SourceCard],
+    Field(discriminator="type"),
+]
 
 
 class Source(BaseModel):
@@ -53,3 +56,27 @@ class Paper(BaseModel):
     topic: str
     source: Source
     cards: List[Card]
+
+
+class SearchHit(BaseModel):
+    id: str
+    title: str
+    topic: str
+    snippet: str
+    score: Optional[float] = None
+
+
+class SearchResults(BaseModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    results: List[SearchHit]
+
+
+class PaperChanges(BaseModel):
+    since: int
+    cursor: int
+    has_more: bool
+    papers: List[Paper]
+    deleted: List[str]
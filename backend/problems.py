@@ -1,19 +1,42 @@
 from __future__ import annotations
 
 import json
+import threading
 from pathlib import Path
-from typing import Any, TypedDict
+from typing import Any, Iterable, Iterator, NotRequired, Optional, TypedDict
 
 DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "paper_seeds.json"
 ATTENTION_PAPER_ID = "attention_is_all_you_need"
 
 
+class PerformanceSpec(TypedDict):
+    generator: str
+    reference: str
+    sizes: list[int]
+    repeat: NotRequired[int]
+    max_slowdown: NotRequired[float]
+    max_exponent: NotRequired[float]
+
+
+class CaseGenerator(TypedDict):
+    version: str
+    source: str
+    reference: str
+    count: int
+    seed: NotRequired[int]
+
+
 class ProblemSpec(TypedDict):
     entry: str
     input: str
     output: str
     time_limit_sec: int
     precision: int
+    case_time_limit_sec: NotRequired[float]
+    abs_tol: NotRequired[float]
+    rel_tol: NotRequired[float]
+    performance: NotRequired[PerformanceSpec]
+    needs_workdir: NotRequired[bool]
 
 
 class TestCase(TypedDict, total=False):
@@ -35,6 +58,7 @@ class Problem(TypedDict):
     starter: str
     tests: list[TestCase]
     run_count: int
+    generated: NotRequired[CaseGenerator]
 
 
 class ProblemTemplate(TypedDict):
@@ -49,6 +73,7 @@ class ProblemTemplate(TypedDict):
     starter: str
     tests: list[TestCase]
     run_count: int
+    generated: NotRequired[CaseGenerator]
 
 
 ATTENTION_TEMPLATES: list[ProblemTemplate] = [
@@ -154,6 +179,25 @@ GENERAL_TEMPLATES: list[ProblemTemplate] = [
             "output": "List[float]",
             "time_limit_sec": 2,
             "precision": 4,
+            "performance": {
+                "generator": (
+                    "import random\n\n"
+                    "def make_args(n):\n"
+                    "    rng = random.Random(n)\n"
+                    "    return [[rng.uniform(-5, 5) for _ in range(n)]]\n"
+                ),
+                "reference": (
+                    "import math\n\n"
+                    "def softmax(scores):\n"
+                    "    peak = max(scores)\n"
+                    "    exps = [math.exp(score - peak) for score in scores]\n"
+                    "    total = sum(exps)\n"
+                    "    return [value / total for value in exps]\n"
+                ),
+                "sizes": [2000, 4000, 8000, 16000, 32000],
+                "max_slowdown": 10,
+                "max_exponent": 1.6,
+            },
         },
         "starter": "def softmax(scores: list[float]):\n    raise NotImplementedError\n",
         "tests": [
@@ -184,6 +228,22 @@ GENERAL_TEMPLATES: list[ProblemTemplate] = [
             "output": "List[int]",
             "time_limit_sec": 2,
             "precision": 4,
+            "performance": {
+                "generator": (
+                    "import random\n\n"
+                    "def make_args(n):\n"
+                    "    rng = random.Random(n)\n"
+                    "    return [[rng.random() for _ in range(n)], n // 2]\n"
+                ),
+                "reference": (
+                    "def topk_indices(values, k):\n"
+                    "    order = sorted(range(len(values)), key=lambda index: -values[index])\n"
+                    "    return order[:k]\n"
+                ),
+                "sizes": [2000, 4000, 8000, 16000, 32000],
+                "max_slowdown": 10,
+                "max_exponent": 1.6,
+            },
         },
         "starter": "def topk_indices(values: list[float], k: int):\n    raise NotImplementedError\n",
         "tests": [
@@ -199,6 +259,21 @@ GENERAL_TEMPLATES: list[ProblemTemplate] = [
             },
         ],
         "run_count": 1,
+        "generated": {
+            "version": "1",
+            "source": (
+                "def make_case(rng, index):\n"
+                "    size = rng.randint(1, 60)\n"
+                "    values = [rng.randint(-20, 20) for _ in range(size)]\n"
+                "    return [values, rng.randint(1, size)]\n"
+            ),
+            "reference": (
+                "def topk_indices(values, k):\n"
+                "    order = sorted(range(len(values)), key=lambda index: (-values[index], index))\n"
+                "    return order[:k]\n"
+            ),
+            "count": 200,
+        },
     },
     {
         "id_suffix": "g3_cosine_similarity",
@@ -245,35 +320,107 @@ def _make_problem_id(paper_id: str, suffix: str) -> str:
     return f"{paper_id}_{suffix}"
 
 
+def normalize_paper_id(paper_id: str) -> str:
+    return paper_id.replace("-", "_")
+
+
+def _templates_for(paper_id: str) -> list[ProblemTemplate]:
+    return ATTENTION_TEMPLATES if paper_id == ATTENTION_PAPER_ID else GENERAL_TEMPLATES
+
+
+def _materialize(paper_id: str, template: ProblemTemplate) -> Problem:
+    problem: Problem = {
+        "id": _make_problem_id(paper_id, template["id_suffix"]),
+        "paper_id": paper_id,
+        "title": template["title"],
+        "type": template["type"],
+        "difficulty": template["difficulty"],
+        "description": template["description"],
+        "goal": template["goal"],
+        "constraints": template["constraints"],
+        "spec": template["spec"],
+        "starter": template["starter"],
+        "tests": template["tests"],
+        "run_count": template["run_count"],
+    }
+    if "generated" in template:
+        problem["generated"] = template["generated"]
+    return problem
+
+
+class ProblemRegistry:
+    def __init__(self, paper_ids: Optional[Iterable[str]] = None):
+        self._paper_ids = list(paper_ids) if paper_ids is not None else None
+        self._by_id: Optional[dict[str, tuple[str, ProblemTemplate]]] = None
+        self._by_paper: dict[str, list[str]] = {}
+        self._built: dict[str, Problem] = {}
+        self._lock = threading.Lock()
+
+    def get(self, problem_id: str) -> Problem:
+        index = self._index()
+        problem = self._built.get(problem_id)
+        if problem is not None:
+            return problem
+        try:
+            paper_id, template = index[problem_id]
+        except KeyError:
+            raise KeyError(f"Problem not found: {problem_id}") from None
+        return self._built.setdefault(problem_id, _materialize(paper_id, template))
+
+    def for_paper(self, paper_id: str) -> list[Problem]:
+        self._index()
+        return [self.get(problem_id) for problem_id in self._by_paper.get(normalize_paper_id(paper_id), [])]
+
+    def __contains__(self, problem_id: str) -> bool:
+        return problem_id in self._index()
+
+    def __iter__(self) -> Iterator[Problem]:
+        return (self.get(problem_id) for problem_id in list(self._index()))
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def _index(self) -> dict[str, tuple[str, ProblemTemplate]]:
+        if self._by_id is not None:
+            return self._by_id
+        with self._lock:
+            if self._by_id is None:
+                paper_ids = self._paper_ids if self._paper_ids is not None else _load_paper_ids()
+                by_id: dict[str, tuple[str, ProblemTemplate]] = {}
+                for paper_id in paper_ids:
+                    ids = self._by_paper.setdefault(paper_id, [])
+                    for template in _templates_for(paper_id):
+                        problem_id = _make_problem_id(paper_id, template["id_suffix"])
+                        by_id[problem_id] = (paper_id, template)
+                        ids.append(problem_id)
+                self._by_id = by_id
+        return self._by_id
+
+
+_REGISTRY = ProblemRegistry()
+
+
 def build_problems() -> list[Problem]:
-    problems: list[Problem] = []
-    for paper_id in _load_paper_ids():
-        templates = ATTENTION_TEMPLATES if paper_id == ATTENTION_PAPER_ID else GENERAL_TEMPLATES
-        for template in templates:
-            problems.append(
-                {
-                    "id": _make_problem_id(paper_id, template["id_suffix"]),
-                    "paper_id": paper_id,
-                    "title": template["title"],
-                    "type": template["type"],
-                    "difficulty": template["difficulty"],
-                    "description": template["description"],
-                    "goal": template["goal"],
-                    "constraints": template["constraints"],
-                    "spec": template["spec"],
-                    "starter": template["starter"],
-                    "tests": template["tests"],
-                    "run_count": template["run_count"],
-                }
-            )
-    return problems
-
-
-_PROBLEMS = build_problems()
+    return list(_REGISTRY)
 
 
 def get_problem(problem_id: str) -> Problem:
-    for problem in _PROBLEMS:
-        if problem["id"] == problem_id:
-            return problem
-    raise KeyError(f"Problem not found: {problem_id}")
+    return _REGISTRY.get(problem_id)
+
+
+def problems_for_paper(paper_id: str) -> list[Problem]:
+    return _REGISTRY.for_paper(paper_id)
+
+
+def public_problem(problem: Problem) -> dict[str, Any]:
+    spec: dict[str, Any] = dict(problem["spec"])
+    performance = spec.get("performance")
+    if performance is not None:
+        spec["performance"] = {
+            key: value for key, value in performance.items() if key not in ("generator", "reference")
+        }
+    public: dict[str, Any] = {**problem, "spec": spec}
+    generated = public.pop("generated", None)
+    if generated is not None:
+        public["hidden_count"] = generated["count"]
+    return public
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Iterable, Iterator, Optional, TextIO, TypedDict
+
+from .evaluator import configure_pool, prepare_cases, run_problem
+from .problems import get_problem
+
+REGRADE_WORKERS = int(os.getenv("JUDGE_REGRADE_WORKERS", str(os.cpu_count() or 2)))
+
+
+class Submission(TypedDict, total=False):
+    id: str
+    problem_id: str
+    code: str
+
+
+class RegradeSummary:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.total = 0
+        self.accepted = 0
+        self.statuses: dict[str, int] = defaultdict(int)
+        self.problems: dict[str, dict[str, int]] = defaultdict(lambda: {"total": 0, "accepted": 0})
+
+    def add(self, result: dict[str, Any]) -> None:
+        accepted = result["status"] == "ok" and result["failed"] == 0
+        self.total += 1
+        self.accepted += accepted
+        self.statuses[result["status"]] += 1
+        problem = self.problems[result["problem_id"]]
+        problem["total"] += 1
+        problem["accepted"] += accepted
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "accepted": self.accepted,
+            "statuses": dict(self.statuses),
+            "problems": dict(self.problems),
+            "elapsed": time.monotonic() - self.started,
+        }
+
+
+def iter_regrade(
+    submissions: Iterable[Submission],
+    workers: int = REGRADE_WORKERS,
+    run_all: bool = True,
+) -> Iterator[dict[str, Any]]:
+    grouped: dict[str, list[Submission]] = defaultdict(list)
+    for submission in submissions:
+        grouped[submission["problem_id"]].append(submission)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="regrade") as executor:
+        pending = {}
+        for problem_id, group in grouped.items():
+            try:
+                problem = get_problem(problem_id)
+            except KeyError:
+                for submission in group:
+                    yield {
+                        "id": submission.get("id"),
+                        "problem_id": problem_id,
+                        "status": "error",
+                        "passed": 0,
+                        "failed": 0,
+                        "total": 0,
+                        "error": "Problem not found",
+                    }
+                continue
+            cases = prepare_cases(problem, run_all)
+            for submission in group:
+                while len(pending) >= workers * 2:
+                    yield from _drain(pending)
+                future = executor.submit(run_problem, problem, submission["code"], run_all, cases=cases)
+                pending[future] = submission
+        while pending:
+            yield from _drain(pending)
+
+
+def _drain(pending: dict[Future, Submission]) -> Iterator[dict[str, Any]]:
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        submission = pending.pop(future)
+        result = future.result()
+        yield {
+            "id": submission.get("id"),
+            "problem_id": submission["problem_id"],
+            "status": result["status"],
+            "passed": result["passed"],
+            "failed": result["failed"],
+            "total": result["total"],
+            "error": result.get("error", ""),
+        }
+
+
+def regrade(
+    submissions: Iterable[Submission],
+    workers: int = REGRADE_WORKERS,
+    run_all: bool = True,
+    progress: Optional[TextIO] = None,
+) -> dict[str, Any]:
+    summary = RegradeSummary()
+    for result in iter_regrade(submissions, workers=workers, run_all=run_all):
+        summary.add(result)
+        if progress is not None:
+            progress.write(json.dumps(result, ensure_ascii=False) + "\n")
+            progress.flush()
+    return summary.to_dict()
+
+
+def _read_submissions(handle: TextIO) -> Iterator[Submission]:
+    for line in handle:
+        if line.strip():
+            yield json.loads(line)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-judge stored submissions in bulk.")
+    parser.add_argument("input", help="JSONL file of {id, problem_id, code}; '-' reads stdin")
+    parser.add_argument("--workers", type=int, default=REGRADE_WORKERS)
+    parser.add_argument("--run", action="store_true", help="only judge the public run cases")
+    parser.add_argument("--summary", help="write the summary JSON to this path")
+    args = parser.parse_args(argv)
+
+    configure_pool(size=args.workers)
+    handle = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        summary = regrade(
+            _read_submissions(handle),
+            workers=args.workers,
+            run_all=not args.run,
+            progress=sys.stdout,
+        )
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as out:
+            json.dump(summary, out, ensure_ascii=False, indent=2)
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+RESPONSE_CACHE_BYTES = int(os.getenv("PAPER_RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))
+COMPRESS_MIN_BYTES = int(os.getenv("PAPER_COMPRESS_MIN_BYTES", "512"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    generation: int
+    headers: dict[str, str] = field(default_factory=dict)
+    etag: str = ""
+    variants: dict[str, bytes] = field(default_factory=dict, compare=False)
+
+    def encoding_for(self, accept_encoding: Optional[str]) -> Optional[str]:
+        if len(self.body) < COMPRESS_MIN_BYTES:
+            return None
+        return negotiate_encoding(accept_encoding)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        if encoding is None:
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag.strip('"').split("-")[0] == self.etag:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class ResponseCache:
+    """Byte-bounded LRU of serialized response bodies, cleared on every write.
+
+    Writes in this process call ``invalidate``. With ``track`` the cache also
+    compares a shared data version on each lookup, so a write committed by
+    another worker process clears it too.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._size = 0
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[Callable[[], int]] = None
+        self._seen_version: Optional[int] = None
+
+    def track(self, version: Callable[[], int]) -> None:
+        """Tie validity to ``version()``, which must change on every write."""
+        with self._lock:
+            self._version = version
+            self._seen_version = None
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], Optional[tuple[bytes, dict[str, str]]]],
+    ) -> Optional[CachedBody]:
+        self._sync()
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            generation = self.generation
+        built = build()
+        if built is None:
+            return None
+        body, headers = built
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = CachedBody(body=body, generation=generation, headers=headers, etag=etag)
+        # A write by another process during the build bumps the generation here.
+        self._sync()
+        self._remember(key, entry)
+        return entry
+
+    def encoded(self, key: Hashable, entry: CachedBody, encoding: Optional[str]) -> bytes:
+        """Return the body in ``encoding``, compressing at most once per entry."""
+        if encoding is None:
+            return entry.body
+        variant = entry.variants.get(encoding)
+        if variant is not None:
+            return variant
+        variant = _compress(entry.body, encoding)
+        with self._lock:
+            if encoding in entry.variants:
+                return entry.variants[encoding]
+            entry.variants[encoding] = variant
+            if self._entries.get(key) is entry:
+                self._size += len(variant)
+                self._evict()
+        return variant
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _sync(self) -> None:
+        version = self._version
+        if version is None:
+            return
+        current = version()
+        with self._lock:
+            if current != self._seen_version:
+                self._seen_version = current
+                self._clear()
+
+    def _clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self.generation,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _remember(self, key: Hashable, entry: CachedBody) -> None:
+        with self._lock:
+            # A write landed while this body was being built; it may be stale.
+            if entry.generation != self.generation or len(entry) > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = entry
+            self._size += len(entry)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
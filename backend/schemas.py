@@ -7,6 +7,8 @@ class RunRequest(BaseModel):
     paper_id: str
     problem_id: str
     code: str
+    fail_fast: bool = False
+    profile: bool = False
 
 
 class RunResponse(BaseModel):
@@ -19,3 +21,27 @@ class RunResponse(BaseModel):
     error: str
     cases: list[dict[str, Any]]
     limitApplied: Optional[bool] = None
+    queueWait: Optional[float] = None
+    execTime: Optional[float] = None
+    cached: Optional[bool] = None
+    cpuTime: Optional[float] = None
+    peakMemoryKb: Optional[int] = None
+    performance: Optional[dict[str, Any]] = None
+    profile: Optional[dict[str, Any]] = None
+
+
+class JobResponse(BaseModel):
+    jobId: str
+    status: Literal["queued", "running", "done"]
+    result: Optional[RunResponse] = None
+
+
+class RegradeSubmission(BaseModel):
+    id: Optional[str] = None
+    problem_id: str
+    code: str
+
+
+class RegradeRequest(BaseModel):
+    submissions: list[RegradeSubmission]
+    run_all: bool = True
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 import pytest
@@ -6,8 +7,10 @@ from fastapi.testclient import TestClient
 
 TEST_DB_PATH = Path(__file__).resolve().parent / "papers.test.db"
 os.environ["PAPER_DB_PATH"] = str(TEST_DB_PATH)
-if TEST_DB_PATH.exists():
-    TEST_DB_PATH.unlink()
+os.environ["CRAWL_CACHE_DIR"] = tempfile.mkdtemp(prefix="crawl-cache-")
+for stale in (TEST_DB_PATH, Path(f"{TEST_DB_PATH}-wal"), Path(f"{TEST_DB_PATH}-shm")):
+    if stale.exists():
+        stale.unlink()
 
 from backend.main import app, crawler  # noqa: E402
 
@@ -33,6 +36,226 @@ def test_list_papers(client: TestClient):
     assert all("source" in paper for paper in payload)
 
 
+def test_list_papers_keyset_pagination(client: TestClient):
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"topic": "Architecture", "limit": 4}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/papers", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 4
+        assert all(paper["topic"] == "Architecture" for paper in page)
+        seen.extend(paper["id"] for paper in page)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    everything = client.get("/papers").json()
+    expected = [paper["id"] for paper in everything if paper["topic"] == "Architecture"]
+    assert seen == expected
+
+
+def test_list_papers_field_projection(client: TestClient):
+    response = client.get("/papers", params={"fields": "title,source", "limit": 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page) == 2
+    assert set(page[0]) == {"id", "title", "source"}
+    assert response.headers["x-next-cursor"] == page[-1]["id"]
+
+    response = client.get("/papers", params={"fields": "title,abstract"})
+    assert response.status_code == 400
+
+
+def test_search_ranks_and_snippets(client: TestClient):
+    response = client.get("/search", params={"q": "attention"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["total"] >= 2
+    ids = [hit["id"] for hit in payload["results"]]
+    assert "attention-is-all-you-need" in ids
+    assert all("<mark>" in hit["snippet"] for hit in payload["results"])
+    scores = [hit["score"] for hit in payload["results"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_chinese_and_pagination(client: TestClient):
+    first = client.get("/search", params={"q": "推理", "limit": 5}).json()
+    assert first["total"] > 5
+    assert len(first["results"]) == 5
+    assert all("<mark>推理</mark>" in hit["snippet"] for hit in first["results"])
+    scores = [hit["score"] for hit in first["results"]]
+    assert None not in scores and scores == sorted(scores, reverse=True)
+    second = client.get("/search", params={"q": "推理", "limit": 5, "offset": 5}).json()
+    assert not {hit["id"] for hit in first["results"]} & {hit["id"] for hit in second["results"]}
+
+    assert client.get("/search", params={"q": "大模型推理"}).status_code == 200
+
+
+def test_search_index_follows_upserts(client: TestClient):
+    from backend.database import upsert_papers
+    from backend.models import HookCard, Paper, Source
+
+    def paper(text: str) -> Paper:
+        return Paper(
+            id="search-upsert",
+            title="检索增量测试",
+            topic="Test",
+            source=Source(title="示例", url="https://example.com/search"),
+            cards=[HookCard(type="hook", text=text)],
+        )
+
+    upsert_papers([paper("量子退火调度器")])
+    hits = client.get("/search", params={"q": "退火调度"}).json()["results"]
+    assert [hit["id"] for hit in hits] == ["search-upsert"]
+
+    two_char = client.get("/search", params={"q": "退火"}).json()["results"]
+    assert "search-upsert" in [hit["id"] for hit in two_char]
+
+    upsert_papers([paper("稀疏专家路由")])
+    assert client.get("/search", params={"q": "退火调度"}).json()["total"] == 0
+    two_char = client.get("/search", params={"q": "退火"}).json()["results"]
+    assert "search-upsert" not in [hit["id"] for hit in two_char]
+    hits = client.get("/search", params={"q": "专家路由"}).json()["results"]
+    assert "search-upsert" in [hit["id"] for hit in hits]
+
+
+def test_paper_responses_cached_until_upsert(client: TestClient):
+    from backend.database import upsert_papers
+    from backend.models import Paper
+    from backend.response_cache import get_response_cache
+
+    cache = get_response_cache()
+    first = client.get("/papers/attention-is-all-you-need")
+    hits = cache.stats()["hits"]
+    second = client.get("/papers/attention-is-all-you-need")
+    assert second.content == first.content
+    assert cache.stats()["hits"] == hits + 1
+
+    paper = Paper.model_validate(first.json())
+    generation = cache.stats()["generation"]
+    upsert_papers([paper.model_copy(update={"title": "Attention (revised)"})])
+    assert cache.stats()["generation"] == generation + 1
+    assert client.get("/papers/attention-is-all-you-need").json()["title"] == "Attention (revised)"
+    upsert_papers([paper])
+
+
+def test_paper_cache_sees_writes_from_other_processes(client: TestClient):
+    import sqlite3
+
+    before = client.get("/papers/attention-is-all-you-need").json()
+    # Another worker's write: same database, but it never touches this process's cache.
+    other = sqlite3.connect(TEST_DB_PATH)
+    with other:
+        other.execute("UPDATE papers SET title = 'Attention (elsewhere)' WHERE id = 'attention-is-all-you-need'")
+        other.execute("UPDATE sync_state SET value = value + 1 WHERE name = 'paper_version'")
+    after = client.get("/papers/attention-is-all-you-need").json()
+    with other:
+        other.execute("UPDATE papers SET title = ? WHERE id = 'attention-is-all-you-need'", (before["title"],))
+        other.execute("UPDATE sync_state SET value = value + 1 WHERE name = 'paper_version'")
+    other.close()
+    assert after["title"] == "Attention (elsewhere)"
+    assert client.get("/papers/attention-is-all-you-need").json() == before
+
+
+def test_paper_etag_and_conditional_get(client: TestClient):
+    response = client.get("/papers/attention-is-all-you-need", headers={"Accept-Encoding": "identity"})
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and "Content-Encoding" not in response.headers
+
+    revalidated = client.get("/papers/attention-is-all-you-need", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    changed = client.get("/papers/attention-is-all-you-need", headers={"If-None-Match": '"stale"'})
+    assert changed.status_code == 200
+
+
+def test_paper_list_precompressed(client: TestClient):
+    from backend.response_cache import get_response_cache
+
+    plain = client.get("/papers", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/papers", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.json() == plain.json()
+    assert compressed.headers["etag"] != plain.headers["etag"]
+
+    cache = get_response_cache()
+    entry = cache.get(("papers", None, None, None, None))
+    variant = entry.variants["gzip"]
+    client.get("/papers", headers={"Accept-Encoding": "gzip"})
+    assert entry.variants["gzip"] is variant
+
+    revalidated = client.get(
+        "/papers", headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_negotiate_encoding():
+    from backend.response_cache import ENCODINGS, negotiate_encoding
+
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("*") == ENCODINGS[0]
+
+
+def test_response_cache_is_bounded():
+    from backend.response_cache import ResponseCache
+
+    cache = ResponseCache(max_bytes=10)
+    cache.get_or_build("a", lambda: (b"12345", {}))
+    cache.get_or_build("b", lambda: (b"12345", {}))
+    cache.get_or_build("c", lambda: (b"12345", {}))
+    assert cache.stats()["bytes"] == 10
+    assert cache.get("a") is None
+    assert cache.get_or_build("huge", lambda: (b"x" * 11, {})).body == b"x" * 11
+    assert cache.get("huge") is None
+
+
+def test_paper_changes_feed(client: TestClient):
+    from backend.database import delete_papers, upsert_papers
+    from backend.models import HookCard, Paper, Source
+
+    first = client.get("/papers/changes", params={"limit": 10}).json()
+    assert len(first["papers"]) == 10
+    assert first["has_more"] is True
+
+    cursor = first["cursor"]
+    while True:
+        page = client.get("/papers/changes", params={"since": cursor, "limit": 500}).json()
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+
+    paper = Paper(
+        id="changes-feed",
+        title="增量同步",
+        topic="Test",
+        source=Source(title="示例", url="https://example.com/changes"),
+        cards=[HookCard(type="hook", text="只下发变化")],
+    )
+    upsert_papers([paper])
+    delete_papers(["changes-feed", "missing-paper"])
+    upsert_papers([paper.model_copy(update={"id": "changes-feed-2"})])
+
+    page = client.get("/papers/changes", params={"since": cursor}).json()
+    assert [item["id"] for item in page["papers"]] == ["changes-feed-2"]
+    assert page["deleted"] == ["changes-feed"]
+    assert page["has_more"] is False
+    assert page["cursor"] > cursor
+
+    upsert_papers([paper.model_copy(update={"id": "changes-feed-2"})])
+    idle = client.get("/papers/changes", params={"since": page["cursor"]}).json()
+    assert idle["papers"] == [] and idle["deleted"] == []
+    assert idle["cursor"] == page["cursor"]
+
+
 def test_get_paper_found(client: TestClient):
     response = client.get("/papers/attention-is-all-you-need")
     assert response.status_code == 200
@@ -48,18 +271,11 @@ def test_get_paper_not_found(client: TestClient):
 def test_crawl_persists(client: TestClient, monkeypatch: pytest.MonkeyPatch):
     import httpx
 
-    class DummyResponse:
-        def __init__(self):
-            self.text = "<html><head><title>示例论文</title></head><body><p>大模型推理很慢。</p><p>我们加速推理。</p></body></html>"
-            self.url = httpx.URL("https://example.com/paper")
-
-        def raise_for_status(self):
-            return None
-
-    def fake_get(url: str):
-        return DummyResponse()
+    def handler(request: httpx.Request) -> httpx.Response:
+        html = "<html><head><title>示例论文</title></head><body><p>大模型推理很慢。</p><p>我们加速推理。</p></body></html>"
+        return httpx.Response(200, text=html)
 
-    monkeypatch.setattr(crawler.client, "get", fake_get)
+    monkeypatch.setattr(crawler, "client", httpx.Client(transport=httpx.MockTransport(handler)))
 
     crawl_response = client.post("/crawl", json={"url": "https://example.com/paper", "topic": "Test"})
     assert crawl_response.status_code == 200
@@ -72,6 +288,193 @@ def test_crawl_persists(client: TestClient, monkeypatch: pytest.MonkeyPatch):
     assert any(paper["id"] == data["id"] for paper in papers_response.json())
 
 
+def test_crawl_revalidates_with_cache(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    from backend.crawler import PaperCrawler
+
+    body = "<html><head><title>缓存论文</title></head><body><p>条件请求。</p></body></html>"
+    seen: list[dict[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(dict(request.headers))
+        if request.url.path == "/etag" and request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        headers = {"ETag": '"v1"'} if request.url.path == "/etag" else {}
+        return httpx.Response(200, text=body, headers=headers)
+
+    monkeypatch.setattr(crawler, "client", httpx.Client(transport=httpx.MockTransport(handler)))
+    extract_calls = []
+    original_extract = PaperCrawler._extract
+
+    def counting_extract(self, html, resolved_url):
+        extract_calls.append(str(resolved_url))
+        return original_extract(self, html, resolved_url)
+
+    monkeypatch.setattr(PaperCrawler, "_extract", counting_extract)
+
+    for path in ("/etag", "/plain"):
+        url = f"https://cache.example{path}"
+        first = client.post("/crawl", json={"url": url, "topic": "Cache"})
+        assert first.headers["x-crawl-cache"] == "miss"
+        second = client.post("/crawl", json={"url": url, "topic": "Cache"})
+        assert second.headers["x-crawl-cache"] == "hit"
+        assert second.json() == first.json()
+
+    assert extract_calls == ["https://cache.example/etag", "https://cache.example/plain"]
+    assert seen[1]["if-none-match"] == '"v1"'
+    assert "if-none-match" not in seen[3]
+
+    retopic = client.post("/crawl", json={"url": "https://cache.example/etag", "topic": "Other"})
+    assert retopic.headers["x-crawl-cache"] == "hit"
+    assert retopic.json()["topic"] == "Other"
+    assert len(extract_calls) == 2
+
+
+def test_crawl_background_job(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    import time
+
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        html = "<html><head><title>后台论文</title></head><body><p>排队抓取。</p></body></html>"
+        return httpx.Response(200, text=html)
+
+    monkeypatch.setattr(crawler, "client", httpx.Client(transport=httpx.MockTransport(handler)))
+
+    response = client.post(
+        "/crawl", json={"url": "https://example.com/background", "topic": "Queue", "background": True}
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in ("queued", "running", "done")
+
+    deadline = time.time() + 5
+    while job["status"] != "done" and time.time() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/crawl/jobs/{job['jobId']}").json()
+    assert job["status"] == "done"
+    assert client.get(f"/papers/{job['paperId']}").json()["topic"] == "Queue"
+
+    assert client.get("/crawl/jobs/missing").status_code == 404
+
+
+def test_crawl_returns_existing_near_duplicate(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        suffix = " (PDF mirror)" if request.url.host == "mirror.example" else ""
+        html = (
+            f"<html><head><title>稀疏注意力的长序列建模{suffix}</title></head><body>"
+            "<p>把全局注意力拆成局部窗口与少量全局令牌，复杂度随序列长度线性增长。</p>"
+            "<p>在长文档问答与基因序列任务上保持精度，同时显著降低显存占用。</p>"
+            "<p>滑动窗口负责局部依赖，空洞窗口扩大感受野，全局令牌汇总任务相关的信息。</p></body></html>"
+        )
+        return httpx.Response(200, text=html)
+
+    monkeypatch.setattr(crawler, "client", httpx.Client(transport=httpx.MockTransport(handler)))
+
+    original = client.post("/crawl", json={"url": "https://arxiv.example/abs/2004.05150", "topic": "Dedup"})
+    assert "x-duplicate-of" not in original.headers
+    mirror = client.post("/crawl", json={"url": "https://mirror.example/2004.05150.pdf", "topic": "Dedup"})
+    assert mirror.status_code == 200
+    assert mirror.headers["x-duplicate-of"] == original.json()["id"]
+    assert mirror.json() == original.json()
+    ids = [paper["id"] for paper in client.get("/papers", params={"topic": "Dedup"}).json()]
+    assert ids == [original.json()["id"]]
+
+
+def test_crawl_keeps_distinct_thin_pages(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        titles = {"/a": "Paper A", "/b": "Paper B", "/gpt": "GPT-3", "/opt": "OPT"}
+        return httpx.Response(200, text=f"<html><head><title>{titles[request.url.path]}</title></head></html>")
+
+    monkeypatch.setattr(crawler, "client", httpx.Client(transport=httpx.MockTransport(handler)))
+
+    ids = set()
+    for path in ("/a", "/b", "/gpt", "/opt"):
+        response = client.post("/crawl", json={"url": f"https://thin.example{path}", "topic": "Thin"})
+        assert response.status_code == 200
+        assert "x-duplicate-of" not in response.headers
+        ids.add(response.json()["id"])
+    assert len(ids) == 4
+    assert {paper["id"] for paper in client.get("/papers", params={"topic": "Thin"}).json()} == ids
+
+
+def test_crawl_batch_streams_results(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    import json
+    import random
+
+    import httpx
+
+    from backend.main import batch_crawler
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        # Mirrors serve the same article under another path.
+        path = request.url.path.replace("/mirror", "")
+        rng = random.Random(path)
+        text = "".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(80))
+        title = f"批量论文 {path}"
+        html = f"<html><head><title>{title}</title></head><body><p>{text}。</p></body></html>"
+        return httpx.Response(200, text=html)
+
+    monkeypatch.setattr(batch_crawler, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    urls = [f"https://site{index % 3}.example/paper-{index}" for index in range(25)]
+    urls += ["https://site0.example/missing", urls[0], "https://site0.example/mirror/paper-3"]
+
+    response = client.post("/crawl/batch", json={"urls": urls, "topic": "Batch"})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results, summary = lines[:-1], lines[-1]["summary"]
+
+    assert summary == {"total": 27, "stored": 25, "duplicates": 1, "failed": 1}
+    assert {result["url"] for result in results} == set(urls)
+    by_url = {result["url"]: result for result in results}
+    mirror = by_url["https://site0.example/mirror/paper-3"]
+    assert mirror["status"] == "duplicate"
+    assert mirror["id"] == by_url["https://site0.example/paper-3"]["id"]
+    failed = [result for result in results if result["status"] == "error"]
+    assert [result["url"] for result in failed] == ["https://site0.example/missing"]
+    stored = next(result for result in results if result["status"] == "ok")
+    assert client.get(f"/papers/{stored['id']}").json()["topic"] == "Batch"
+
+
+def test_batch_crawler_limits_per_host():
+    import asyncio
+
+    import httpx
+
+    from backend.crawler import BatchCrawler, PaperCrawler
+
+    in_flight: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, text="<title>t</title><p>x</p>")
+
+    async def run() -> list:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        batch = BatchCrawler(PaperCrawler(), concurrency=8, per_host=2, client=client)
+        urls = [f"https://host{index % 2}.example/{index}" for index in range(12)]
+        outcomes = [outcome async for outcome in batch.crawl_many(urls, "Test")]
+        assert batch._hosts == {}
+        await batch.aclose()
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    assert len(outcomes) == 12 and all(outcome.paper for outcome in outcomes)
+    assert peak == {"host0.example": 2, "host1.example": 2}
+
+
 def test_run_problem_endpoint(client: TestClient):
     code = """
 import math
@@ -132,3 +535,138 @@ def positional_encoding(max_len: int, d_model: int):
     payload = response.json()
     assert payload["status"] == "ok"
     assert payload["total"] == 2
+
+
+def test_submit_job_and_poll(client: TestClient):
+    response = client.post(
+        "/api/submit/jobs",
+        json={
+            "paper_id": "attention_is_all_you_need",
+            "problem_id": "a1_positional_encoding",
+            "code": "def positional_encoding(max_len, d_model):\n    return []\n",
+        },
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in {"queued", "running", "done"}
+
+    poll = client.get(f"/api/jobs/{job['jobId']}", params={"wait": 10})
+    assert poll.status_code == 200
+    payload = poll.json()
+    assert payload["status"] == "done"
+    assert payload["result"]["total"] == 2
+    assert payload["result"]["failed"] == 2
+
+
+def test_job_is_done_only_with_a_result():
+    from concurrent.futures import Future
+
+    from backend.judge_queue import JudgeJob
+    from backend.main import _job_response
+
+    job = JudgeJob(id="job", problem_id="a1_positional_encoding", run_all=True, future=Future(), status="done")
+    assert _job_response(job).status == "running"
+    job.future.set_result(
+        {"status": "ok", "passed": 1, "failed": 0, "total": 1, "duration": 0.1, "output": "", "error": "", "cases": []}
+    )
+    response = _job_response(job)
+    assert response.status == "done" and response.result.passed == 1
+
+
+def test_get_job_not_found(client: TestClient):
+    response = client.get("/api/jobs/missing")
+    assert response.status_code == 404
+
+
+def test_run_problem_served_from_cache(client: TestClient):
+    body = {
+        "paper_id": "attention_is_all_you_need",
+        "problem_id": "a1_positional_encoding",
+        "code": "def positional_encoding(max_len, d_model):\n    return [[0, 1, 0, 1]]\n",
+    }
+    first = client.post("/api/run", json=body).json()
+    body["code"] = "# reformatted\ndef positional_encoding( max_len, d_model ):\n    return [[0, 1, 0, 1]]\n"
+    second = client.post("/api/run", json=body).json()
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["passed"] == first["passed"] == 1
+
+
+def _parse_events(body: str) -> list[tuple[str, dict]]:
+    import json
+
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_submit_stream_emits_cases_then_summary(client: TestClient):
+    body = {
+        "paper_id": "attention_is_all_you_need",
+        "problem_id": "a1_positional_encoding",
+        "code": "def positional_encoding(max_len, d_model):\n    return [[0, 1, 0, 1]]\n",
+    }
+    for _ in range(2):
+        response = client.post("/api/submit/stream", json=body)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_events(response.text)
+        assert [name for name, _ in events] == ["case", "case", "summary"]
+        assert [data["index"] for _, data in events[:2]] == [0, 1]
+        assert events[0][1]["ok"] is True
+        assert events[1][1]["ok"] is False
+        summary = events[-1][1]
+        assert summary["passed"] == 1
+        assert summary["total"] == 2
+        assert "cases" not in summary
+    assert summary["cached"] is True
+
+
+def test_regrade_endpoint_streams_results(client: TestClient):
+    import json
+
+    response = client.post(
+        "/api/regrade",
+        json={
+            "submissions": [
+                {"id": "1", "problem_id": "a1_positional_encoding", "code": "def positional_encoding(a, b):\n    return []\n"},
+                {"id": "2", "problem_id": "missing", "code": ""},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {line["id"] for line in lines[:-1]} == {"1", "2"}
+    assert lines[-1]["summary"]["total"] == 2
+
+
+def test_list_paper_problems(client: TestClient):
+    response = client.get("/papers/attention-is-all-you-need/problems")
+    assert response.status_code == 200
+    problems = response.json()
+    assert [problem["id"] for problem in problems] == [
+        "a1_positional_encoding",
+        "a2_scaled_dot_attention",
+        "a3_split_heads",
+    ]
+
+    general = client.get("/papers/lora-low-rank/problems").json()
+    softmax = next(problem for problem in general if problem["id"] == "lora_low_rank_g1_softmax")
+    assert "reference" not in softmax["spec"]["performance"]
+    assert softmax["spec"]["performance"]["sizes"]
+
+
+def test_list_paper_problems_not_found(client: TestClient):
+    response = client.get("/papers/missing/problems")
+    assert response.status_code == 404
+
+
+def test_db_pool_reuses_connections(client: TestClient):
+    for _ in range(3):
+        client.get("/papers/attention-is-all-you-need")
+    stats = client.get("/health/db").json()
+    assert stats["hits"] >= 3
+    assert stats["open"] <= stats["size"]
+    assert str(stats["pragmas"]["journal_mode"]).lower() == "wal"
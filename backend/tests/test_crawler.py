@@ -0,0 +1,82 @@
+import httpx
+
+from backend.crawler import CrawlCache, PaperCrawler, read_capped
+from backend.html_extract import extract_html
+
+
+def test_extract_html_strips_scripts_and_decodes_entities():
+    html = (
+        "<html><head><title> R&amp;D &#x4E2D;文 </title><style>p { color: red }</style></head>"
+        "<body><script>var p = '<p>not text</p>';</script>"
+        "<p>First <b>bold</b> &lt;tag&gt;\n  line</p>"
+        "<p>Implicit close<div>block</div>"
+        "<p>   </p><p>Last</body></html>"
+    )
+    title, paragraphs = extract_html([html.encode("utf-8")])
+    assert title == "R&D 中文"
+    assert paragraphs == ["First bold <tag> line", "Implicit close", "Last"]
+
+
+def test_extract_html_stops_after_enough_paragraphs():
+    consumed = []
+
+    def chunks():
+        yield "<title>t</title>".encode("utf-8")
+        for index in range(1000):
+            consumed.append(index)
+            yield f"<p>段落 {index}</p>".encode("utf-8")
+
+    title, paragraphs = extract_html(chunks(), max_paragraphs=3)
+    assert paragraphs == ["段落 0", "段落 1", "段落 2"]
+    assert len(consumed) < 10
+
+
+def test_extract_html_handles_split_multibyte_and_byte_cap():
+    encoded = "<p>中文段落</p><p>第二段</p>".encode("utf-8")
+    pieces = [encoded[index : index + 1] for index in range(len(encoded))]
+    assert extract_html(pieces)[1] == ["中文段落", "第二段"]
+
+    capped = extract_html(pieces, max_bytes=len("<p>中文段落</p>".encode("utf-8")))
+    assert capped == (None, ["中文段落"])
+    assert extract_html(["<p>caf\xe9</p>".encode("latin-1")], encoding="iso-8859-1")[1] == ["café"]
+
+
+def test_crawler_bounds_download_size(tmp_path):
+    assert sum(map(len, read_capped([b"x" * 40] * 5, max_bytes=64))) == 64
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="<title>大页面</title>" + "<p>填充内容。</p>" * 200_000)
+
+    crawler = PaperCrawler(
+        client=httpx.Client(transport=httpx.MockTransport(handler)), cache=CrawlCache(tmp_path)
+    )
+    paper = crawler.crawl("https://example.com/huge", "Test")
+    assert paper.title == "大页面"
+    assert paper.cards[0].text == "填充内容"
+
+
+def test_batch_crawler_reports_unexpected_errors_per_url(tmp_path):
+    import asyncio
+
+    from backend.crawler import BatchCrawler
+
+    class ReadOnlyCache(CrawlCache):
+        def put(self, url, entry):
+            if url.endswith("/readonly"):
+                raise OSError("read-only file system")
+            super().put(url, entry)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=f"<title>{request.url.path}</title><p>正文。</p>")
+
+    async def run() -> dict:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        batch = BatchCrawler(PaperCrawler(cache=ReadOnlyCache(tmp_path)), client=client)
+        urls = ["https://example.com/readonly", "https://example.com/ok"]
+        outcomes = {outcome.url: outcome async for outcome in batch.crawl_many(urls, "Test")}
+        await batch.aclose()
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    assert outcomes["https://example.com/readonly"].error == "read-only file system"
+    assert outcomes["https://example.com/ok"].paper.title == "/ok"
@@ -0,0 +1,243 @@
+import json
+import threading
+import time
+
+import pytest
+
+from backend import data, database
+from backend.database import ConnectionPool
+
+
+def test_connection_pool_applies_pragmas(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", size=2)
+    try:
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -16000
+        with pool.connection():
+            pass
+        stats = pool.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["idle"] == 1
+    finally:
+        pool.close()
+
+
+def test_connection_pool_waits_when_exhausted(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", size=1)
+    released = threading.Event()
+
+    def hold():
+        with pool.connection():
+            released.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    time.sleep(0.05)
+    threading.Timer(0.1, released.set).start()
+    try:
+        with pool.connection() as conn:
+            assert conn.execute("SELECT 1").fetchone()[0] == 1
+        holder.join()
+        stats = pool.stats()
+        assert stats["open"] == 1
+        assert stats["waits"] == 1
+        assert stats["waitTime"] > 0
+    finally:
+        pool.close()
+
+
+@pytest.fixture
+def isolated_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "isolated.db")
+    database.close_db_pool()
+    database.init_db()
+    yield
+    database.close_db_pool()
+
+
+@pytest.fixture
+def seeded_db(tmp_path, monkeypatch, isolated_db):
+    seeds = json.loads(data.DATA_PATH.read_text(encoding="utf-8"))[:3]
+    seed_path = tmp_path / "seeds.json"
+    seed_path.write_text(json.dumps(seeds, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(data, "DATA_PATH", seed_path)
+    return seed_path, seeds
+
+
+def test_sync_seeds_skips_unchanged_file(seeded_db):
+    assert data.sync_sample_papers() == {"skipped": False, "written": 3, "removed": 0}
+    assert data.sync_sample_papers() == {"skipped": True, "written": 0, "removed": 0}
+    assert len(database.list_papers()) == 3
+
+
+def test_sync_seeds_writes_only_changed_rows(seeded_db):
+    seed_path, seeds = seeded_db
+    data.sync_sample_papers()
+    seeds[0]["title"] = "Renamed seed"
+    seed_path.write_text(json.dumps(seeds[:2], ensure_ascii=False), encoding="utf-8")
+
+    assert data.sync_sample_papers() == {"skipped": False, "written": 1, "removed": 1}
+    papers = {paper.id: paper for paper in database.list_papers()}
+    assert set(papers) == {seeds[0]["id"], seeds[1]["id"]}
+    assert papers[seeds[0]["id"]].title == "Renamed seed"
+
+
+def test_sync_seeds_runs_once_across_workers(seeded_db):
+    results: list[dict] = []
+    threads = [threading.Thread(target=lambda: results.append(data.sync_sample_papers())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(not result["skipped"] for result in results) == 1
+    assert sum(result["written"] for result in results) == 3
+
+
+def test_sync_seeds_outwaits_long_lock(seeded_db, monkeypatch):
+    import sqlite3
+
+    monkeypatch.setitem(database.DB_PRAGMAS, "busy_timeout", 50)
+    database.close_db_pool()
+    holder = sqlite3.connect(database.DB_PATH)
+    holder.execute("BEGIN IMMEDIATE")
+    results: list[dict] = []
+    worker = threading.Thread(target=lambda: results.append(data.sync_sample_papers()))
+    worker.start()
+    time.sleep(0.3)
+    assert worker.is_alive()
+    holder.rollback()
+    holder.close()
+    worker.join(5)
+    assert results == [{"skipped": False, "written": 3, "removed": 0}]
+
+
+def test_init_db_versions_existing_rows(tmp_path, monkeypatch):
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE papers (id TEXT PRIMARY KEY, title TEXT NOT NULL, topic TEXT NOT NULL, "
+        "source_title TEXT NOT NULL, source_url TEXT NOT NULL, cards TEXT NOT NULL)"
+    )
+    legacy.executemany(
+        "INSERT INTO papers VALUES (?, ?, 'Test', 'src', 'https://example.com', '[]')",
+        [("b", "B"), ("a", "A")],
+    )
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.close_db_pool()
+    try:
+        database.init_db()
+        papers, deleted, cursor, has_more = database.list_changes(0, 10)
+        assert [paper.id for paper in papers] == ["b", "a"]
+        assert deleted == [] and cursor == 2 and has_more is False
+        assert database.search_papers("B")[0] == 1
+    finally:
+        database.close_db_pool()
+
+
+def test_crawl_queue_dedupes_active_urls(isolated_db):
+    from backend import crawl_queue
+
+    first = crawl_queue.enqueue_crawl("https://example.com/a", "Test")
+    assert crawl_queue.enqueue_crawl("https://example.com/a", "Test").id == first.id
+    claimed = crawl_queue.claim_crawl_job()
+    assert claimed.id == first.id and claimed.status == "running" and claimed.attempts == 1
+    assert crawl_queue.enqueue_crawl("https://example.com/a", "Test").id == first.id
+
+    crawl_queue.complete_crawl_job(first.id, "paper-a")
+    assert crawl_queue.get_crawl_job(first.id).status == "done"
+    assert crawl_queue.enqueue_crawl("https://example.com/a", "Test").id != first.id
+
+
+def test_crawl_queue_backs_off_then_fails(isolated_db, monkeypatch):
+    from backend import crawl_queue
+
+    monkeypatch.setattr(crawl_queue, "CRAWL_BACKOFF_BASE_SEC", 10.0)
+    job = crawl_queue.enqueue_crawl("https://example.com/flaky", "Test", max_attempts=3)
+    now = time.time()
+    delays = []
+    for attempt in range(3):
+        claimed = crawl_queue.claim_crawl_job(now=now)
+        assert claimed.id == job.id and claimed.attempts == attempt + 1
+        failed = crawl_queue.fail_crawl_job(job.id, "boom", now=now)
+        if failed.status == "queued":
+            delays.append(failed.next_attempt_at - now)
+            assert crawl_queue.claim_crawl_job(now=now) is None
+            now = failed.next_attempt_at
+    assert delays == [10.0, 20.0]
+    assert failed.status == "failed" and failed.last_error == "boom"
+
+
+def test_crawl_queue_fails_expired_lease_on_last_attempt(isolated_db):
+    from backend import crawl_queue
+
+    job = crawl_queue.enqueue_crawl("https://example.com/crashes-worker", "Test", max_attempts=2)
+    now = time.time()
+    for attempt in range(2):
+        # The worker dies mid-crawl, so the lease simply expires.
+        assert crawl_queue.claim_crawl_job(now=now).attempts == attempt + 1
+        now += crawl_queue.CRAWL_LEASE_SEC + 1
+    assert crawl_queue.claim_crawl_job(now=now) is None
+    expired = crawl_queue.get_crawl_job(job.id)
+    assert expired.status == "failed" and expired.attempts == 2
+    assert expired.last_error == "Worker lease expired"
+
+
+def test_crawl_worker_skips_retries_for_client_errors(isolated_db, tmp_path):
+    import httpx
+
+    from backend import crawl_queue
+    from backend.crawler import CrawlCache, PaperCrawler
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/gone":
+            return httpx.Response(404)
+        return httpx.Response(200, text="<title>队列论文</title><p>后台抓取。</p>")
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    worker = crawl_queue.CrawlWorker(PaperCrawler(client=client, cache=CrawlCache(tmp_path / "crawl")))
+    gone = crawl_queue.enqueue_crawl("https://example.com/gone", "Test")
+    ok = crawl_queue.enqueue_crawl("https://example.com/ok", "Test")
+    assert worker.run_once().status == "failed"
+    done = worker.run_once()
+    assert done.id == ok.id and done.status == "done"
+    assert database.fetch_paper(done.paper_id).title == "队列论文"
+    assert crawl_queue.get_crawl_job(gone.id).attempts == 1
+
+
+def test_upsert_merges_near_duplicates(isolated_db):
+    from backend import dedup
+
+    first, second = [data.paper_from_seed(seed) for seed in data._load_seeds()[:2]]
+    mirror = first.model_copy(update={"id": "mirror-copy", "title": f"{first.title} (mirror)"})
+    assert database.upsert_papers([first, mirror]) == {"mirror-copy": first.id}
+    assert database.fetch_paper("mirror-copy") is None
+    assert database.upsert_papers([first.model_copy(update={"title": "revised"})]) == {}
+    assert database.upsert_papers([second]) == {}
+
+    database.delete_papers([first.id])
+    assert database.upsert_papers([mirror]) == {}
+
+    database.upsert_papers([first], dedup=False)
+    report = dedup.backfill(rebuild=True)
+    assert report["indexed"] == 3
+    assert [(item["id"], item["duplicate_of"]) for item in report["duplicates"]] == [("mirror-copy", first.id)]
+
+
+def test_dedup_candidates_use_bucket_index(isolated_db):
+    from backend import dedup
+
+    query = dedup._candidate_query(dedup.DEDUP_BANDS)
+    params = ["paper", *[0] * (2 * dedup.DEDUP_BANDS)]
+    with database.get_connection() as conn:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+    bucket_steps = [step for step in plan if "paper_buckets" in step]
+    assert len(bucket_steps) == dedup.DEDUP_BANDS
+    assert all(step.startswith("SEARCH paper_buckets USING PRIMARY KEY (band=? AND bucket=?)") for step in bucket_steps)
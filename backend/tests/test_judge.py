@@ -1,5 +1,13 @@
-from backend.evaluator import run_problem
-from backend.problems import get_problem
+import json
+
+import pytest
+
+from backend import case_generators
+from backend.evaluator import RUNNER_SOURCE, RunnerPool, run_problem, stream_problem
+from backend.judge_queue import JudgeQueue, QueueFullError
+from backend.problems import ProblemRegistry, get_problem
+from backend.regrade import iter_regrade, main as regrade_main
+from backend.verdict_cache import VerdictCache, normalize_code
 
 GOOD_CODE = """
 import math
@@ -32,6 +40,14 @@ def positional_encoding(max_len: int, d_model: int):
     return []
 """
 
+SLOW_CODE = """
+import time
+
+def positional_encoding(max_len: int, d_model: int):
+    time.sleep(0.2)
+    return []
+"""
+
 LIMIT_CODE = """
 import resource
 
@@ -75,3 +91,477 @@ def test_run_problem_sets_memory_limit():
     effective = [limit for limit in (as_limit, data_limit) if limit > 0]
     if limit_applied:
         assert any(limit < 512 * 1024 * 1024 for limit in effective)
+
+
+def test_run_problem_reports_queue_and_exec_time():
+    problem = get_problem("a1_positional_encoding")
+    result = run_problem(problem, GOOD_CODE, run_all=False)
+    assert result["queueWait"] >= 0
+    assert result["execTime"] > 0
+    assert result["duration"] >= result["execTime"]
+
+
+def test_runner_pool_replaces_used_workers():
+    pool = RunnerPool(size=2, max_idle_sec=60)
+    try:
+        pool.warm()
+        assert pool.idle_count() == 2
+        first = pool.acquire()
+        assert pool.idle_count() == 2
+        second = pool.acquire()
+        assert first.pid != second.pid
+        for process in (first, second):
+            process.stdin.close()
+            process.wait(timeout=5)
+    finally:
+        pool.shutdown()
+    assert pool.idle_count() == 0
+
+
+def test_runner_pool_recycles_stale_workers():
+    pool = RunnerPool(size=1, max_idle_sec=0)
+    try:
+        pool.warm()
+        stale = next(iter(pool._idle)).process
+        fresh = pool.acquire()
+        assert fresh.pid != stale.pid
+        assert stale.poll() is not None
+        fresh.stdin.close()
+        fresh.wait(timeout=5)
+    finally:
+        pool.shutdown()
+
+
+def test_judge_queue_rejects_when_full():
+    problem = get_problem("a1_positional_encoding")
+    queue = JudgeQueue(concurrency=1, max_pending=1)
+    try:
+        job = queue.submit(problem, SLOW_CODE, run_all=True)
+        with pytest.raises(QueueFullError):
+            queue.submit(problem, SLOW_CODE, run_all=True)
+        result = job.future.result(timeout=10)
+        assert result["status"] == "ok"
+        assert job.status == "done"
+        assert queue.pending() == 0
+    finally:
+        queue.shutdown()
+
+
+def test_normalize_code_ignores_formatting():
+    compact = "def f(x):\n    return x+1\n"
+    noisy = "# helper\ndef f( x ):\n\n    return (x + 1)  # add one\n"
+    assert normalize_code(compact) == normalize_code(noisy)
+    assert normalize_code(compact) != normalize_code("def f(x):\n    return x+2\n")
+
+
+def test_verdict_cache_lru_and_invalidation():
+    problem = get_problem("a1_positional_encoding")
+    cache = VerdictCache(max_entries=1, path=None)
+    result = {"status": "ok", "passed": 1, "failed": 0, "total": 1, "cases": []}
+    cache.put(problem, GOOD_CODE, False, result)
+    assert cache.get(problem, GOOD_CODE + "\n# same\n", False) == result
+    assert cache.get(problem, GOOD_CODE, True) is None
+
+    changed = {**problem, "tests": problem["tests"][:1]}
+    assert cache.get(changed, GOOD_CODE, False) is None
+
+    cache.put(problem, BAD_CODE, False, result)
+    assert len(cache) == 1
+    assert cache.get(problem, GOOD_CODE, False) is None
+
+    cache.put(problem, GOOD_CODE, False, {**result, "status": "timeout"})
+    assert cache.get(problem, GOOD_CODE, False) is None
+
+    slow = {**result, "performance": {"ok": False, "exponent": 2.1}}
+    cache.put(problem, GOOD_CODE, True, slow)
+    assert cache.get(problem, GOOD_CODE, True) is None
+
+
+def test_verdict_cache_keeps_tracebacks_exact_and_skips_host_failures():
+    problem = get_problem("a1_positional_encoding")
+    cache = VerdictCache(path=None)
+    failing = {
+        "status": "ok",
+        "passed": 0,
+        "failed": 1,
+        "total": 1,
+        "cases": [{"ok": False, "error": 'File "solution.py", line 2, in positional_encoding'}],
+    }
+    cache.put(problem, GOOD_CODE, False, failing)
+    assert cache.get(problem, GOOD_CODE, False) == failing
+    assert cache.get(problem, "\n# moved down\n" + GOOD_CODE, False) is None
+
+    crashed = {"status": "error", "passed": 0, "failed": 1, "total": 1, "cases": [], "error": "Traceback"}
+    cache.put(problem, BAD_CODE, False, {**crashed, "exitCode": -9})
+    cache.put(problem, BAD_CODE, True, crashed)
+    assert cache.get(problem, BAD_CODE, False) is None
+    assert cache.get(problem, BAD_CODE, True) is None
+    cache.put(problem, BAD_CODE, False, {**crashed, "exitCode": 1})
+    assert cache.get(problem, BAD_CODE, False)["exitCode"] == 1
+
+
+def test_verdict_cache_persists(tmp_path):
+    problem = get_problem("a1_positional_encoding")
+    path = tmp_path / "verdicts.db"
+    result = {"status": "ok", "passed": 1, "failed": 0, "total": 1, "cases": []}
+    VerdictCache(path=str(path)).put(problem, GOOD_CODE, False, result)
+    assert VerdictCache(path=str(path)).get(problem, GOOD_CODE, False) == result
+
+
+def test_verdict_cache_bounds_persisted_rows(tmp_path):
+    import sqlite3
+
+    problem = get_problem("a1_positional_encoding")
+    path = tmp_path / "verdicts.db"
+    cache = VerdictCache(max_entries=1, path=str(path), max_rows=3)
+    result = {"status": "ok", "passed": 1, "failed": 0, "total": 1, "cases": []}
+    codes = [f"{GOOD_CODE}\nVARIANT = {index}\n" for index in range(5)]
+    for code in codes:
+        cache.put(problem, code, False, result)
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT count(*) FROM verdicts").fetchone()[0] == 3
+    conn.close()
+    reopened = VerdictCache(path=str(path))
+    assert reopened.get(problem, codes[0], False) is None
+    assert reopened.get(problem, codes[-1], False) == result
+
+
+def test_verdict_key_covers_runner(monkeypatch):
+    from backend import verdict_cache
+
+    problem = get_problem("a1_positional_encoding")
+    before = verdict_cache.tests_version(problem)
+    monkeypatch.setattr(verdict_cache, "RUNNER_VERSION", "next-runner")
+    assert verdict_cache.tests_version(problem) != before
+
+
+def test_stream_problem_yields_each_case():
+    problem = get_problem("a1_positional_encoding")
+    messages = list(stream_problem(problem, GOOD_CODE, run_all=True))
+    assert [message["event"] for message in messages] == ["case", "case", "summary"]
+    assert messages[-1]["passed"] == 2
+
+
+def test_run_problem_captures_prints_as_output():
+    problem = get_problem("a1_positional_encoding")
+    code = "def positional_encoding(max_len, d_model):\n    print('debug line')\n    return []\n"
+    result = run_problem(problem, code, run_all=False)
+    assert result["status"] == "ok"
+    assert "debug line" in result["output"]
+
+
+HANG_ON_EMPTY_CODE = GOOD_CODE + """
+
+_reference = positional_encoding
+
+
+def positional_encoding(max_len: int, d_model: int):
+    while max_len == 0:
+        pass
+    return _reference(max_len, d_model)
+"""
+
+UNSTOPPABLE_CODE = GOOD_CODE + """
+
+import signal
+
+_reference = positional_encoding
+
+
+def positional_encoding(max_len: int, d_model: int):
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    while max_len == 0:
+        pass
+    return _reference(max_len, d_model)
+"""
+
+MIXED_TESTS = [
+    {"args": [1, 4], "expected": [[0, 1, 0, 1]]},
+    {"args": [0, 0], "expected": []},
+    {"args": [1, 4], "expected": [[0, 1, 0, 1]]},
+]
+
+
+def _with_cases(problem, tests, **spec):
+    return {**problem, "tests": tests, "spec": {**problem["spec"], **spec}}
+
+
+def test_slow_case_times_out_individually():
+    problem = _with_cases(get_problem("a1_positional_encoding"), MIXED_TESTS, case_time_limit_sec=0.3)
+    result = run_problem(problem, HANG_ON_EMPTY_CODE, run_all=True)
+    assert result["status"] == "timeout"
+    assert result["passed"] == 2
+    assert [case.get("timeout", False) for case in result["cases"]] == [False, True, False]
+
+
+def test_fail_fast_skips_remaining_cases():
+    problem = get_problem("a1_positional_encoding")
+    result = run_problem(problem, BAD_CODE, run_all=True, fail_fast=True)
+    assert result["failed"] == 2
+    assert result["cases"][0]["ok"] is False
+    assert result["cases"][1]["skipped"] is True
+
+
+def test_watchdog_keeps_completed_cases():
+    problem = _with_cases(get_problem("a1_positional_encoding"), MIXED_TESTS, time_limit_sec=0.5)
+    result = run_problem(problem, UNSTOPPABLE_CODE, run_all=True)
+    assert result["status"] == "timeout"
+    assert result["error"] == "Time limit exceeded"
+    assert result["passed"] == 1
+    assert [case["ok"] for case in result["cases"]] == [True]
+
+
+def test_run_problem_reports_cpu_and_memory():
+    problem = get_problem("a1_positional_encoding")
+    code = GOOD_CODE + "\n\n_reference = positional_encoding\n\ndef positional_encoding(max_len, d_model):\n    sum(range(200000))\n    return _reference(max_len, d_model)\n"
+    result = run_problem(problem, code, run_all=True)
+    assert result["cpuTime"] > 0
+    assert result["peakMemoryKb"] > 0
+    for case in result["cases"]:
+        assert case["cpuTime"] > 0
+        assert case["wallTime"] >= 0
+        assert case["peakMemoryKb"] <= result["peakMemoryKb"]
+    assert abs(sum(case["cpuTime"] for case in result["cases"]) - result["cpuTime"]) < 1e-6
+
+
+SOFTMAX_CODE = """
+import math
+
+def softmax(scores):
+    peak = max(scores)
+    exps = [math.exp(score - peak) for score in scores]
+    total = sum(exps)
+    return [value / total for value in exps]
+"""
+
+QUADRATIC_SOFTMAX_CODE = """
+import math
+
+def softmax(scores):
+    return [math.exp(score) / sum(math.exp(other) for other in scores) for score in scores]
+"""
+
+
+def _softmax_problem():
+    problem = get_problem("lora_low_rank_g1_softmax")
+    performance = {**problem["spec"]["performance"], "sizes": [200, 400, 800, 1600]}
+    return _with_cases(problem, problem["tests"], performance=performance)
+
+
+def test_performance_verdict_passes_linear_solution():
+    result = run_problem(_softmax_problem(), SOFTMAX_CODE, run_all=True)
+    assert result["passed"] == result["total"]
+    assert result["performance"]["ok"] is True
+    assert len(result["performance"]["timings"]) == 4
+
+
+def test_performance_verdict_rejects_quadratic_solution():
+    result = run_problem(_softmax_problem(), QUADRATIC_SOFTMAX_CODE, run_all=True)
+    assert result["passed"] == result["total"]
+    performance = result["performance"]
+    assert performance["ok"] is False
+    assert performance.get("timeout") or performance["slowdown"] > performance["maxSlowdown"]
+
+
+def test_performance_skipped_for_run_and_wrong_answers():
+    problem = _softmax_problem()
+    assert run_problem(problem, SOFTMAX_CODE, run_all=False).get("performance") is None
+    wrong = run_problem(problem, "def softmax(scores):\n    return scores\n", run_all=True)
+    assert wrong["performance"] == {"ok": False, "skipped": True}
+
+
+PROFILED_CODE = """
+def helper(values):
+    return [value * 2 for value in values]
+
+
+def positional_encoding(max_len: int, d_model: int):
+    for _ in range(50):
+        helper(list(range(100)))
+    return [[0, 1, 0, 1]]
+"""
+
+
+def test_profile_mode_reports_hot_functions_and_lines():
+    problem = get_problem("a1_positional_encoding")
+    result = run_problem(problem, PROFILED_CODE, run_all=False, profile=True)
+    report = result["profile"]
+    names = {row["function"]: row for row in report["functions"]}
+    assert names["helper"]["calls"] == 50
+    assert names["positional_encoding"]["cumulativeTime"] >= names["helper"]["cumulativeTime"]
+    assert len(report["functions"]) <= 15
+    assert any(row["code"].startswith("return [value * 2") for row in report["lines"])
+
+
+def test_profile_mode_off_by_default():
+    problem = get_problem("a1_positional_encoding")
+    assert run_problem(problem, PROFILED_CODE, run_all=False).get("profile") is None
+
+
+def test_run_problem_ships_code_in_memory():
+    problem = get_problem("a1_positional_encoding")
+    code = "import os\n\ndef positional_encoding(max_len, d_model):\n    return sorted(os.listdir('.'))\n"
+    result = run_problem(problem, code, run_all=False)
+    assert result["cases"][0]["output"] == []
+
+
+def test_run_problem_tracebacks_show_solution_source():
+    problem = get_problem("a1_positional_encoding")
+    code = "def positional_encoding(max_len, d_model):\n    return 1 / 0\n"
+    result = run_problem(problem, code, run_all=False)
+    error = result["cases"][0]["error"]
+    assert 'File "solution.py", line 2' in error
+    assert "return 1 / 0" in error
+
+
+def test_run_problem_scratch_dir_when_needed():
+    problem = get_problem("a1_positional_encoding")
+    problem = {**problem, "spec": {**problem["spec"], "needs_workdir": True}}
+    code = (
+        "def positional_encoding(max_len, d_model):\n"
+        "    with open('scratch.txt', 'w') as handle:\n"
+        "        handle.write('ok')\n"
+        "    with open('scratch.txt') as handle:\n"
+        "        return handle.read()\n"
+    )
+    result = run_problem(problem, code, run_all=False)
+    assert result["cases"][0]["output"] == "ok"
+
+
+def test_run_problem_streams_large_payloads():
+    problem = get_problem("a1_positional_encoding")
+    tests = [{"args": [list(range(5000)), 0], "expected": 5000} for _ in range(40)]
+    problem = {**problem, "tests": tests}
+    code = "def positional_encoding(values, _unused):\n    return len(values)\n"
+    result = run_problem(problem, code, run_all=True)
+    assert result["status"] == "ok"
+    assert result["passed"] == 40
+
+
+def test_regrade_groups_jobs_and_summarizes(tmp_path):
+    submissions = [
+        {"id": "good", "problem_id": "a1_positional_encoding", "code": GOOD_CODE},
+        {"id": "bad", "problem_id": "a1_positional_encoding", "code": BAD_CODE},
+        {"id": "gone", "problem_id": "missing_problem", "code": GOOD_CODE},
+    ]
+    source = tmp_path / "submissions.jsonl"
+    source.write_text("\n".join(json.dumps(item) for item in submissions), encoding="utf-8")
+    summary_path = tmp_path / "summary.json"
+
+    assert regrade_main([str(source), "--workers", "2", "--summary", str(summary_path)]) == 0
+
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    assert summary["total"] == 3
+    assert summary["accepted"] == 1
+    assert summary["statuses"] == {"ok": 2, "error": 1}
+    assert summary["problems"]["a1_positional_encoding"] == {"total": 2, "accepted": 1}
+
+
+def test_iter_regrade_yields_each_submission():
+    submissions = [
+        {"id": str(index), "problem_id": "a1_positional_encoding", "code": GOOD_CODE} for index in range(5)
+    ]
+    results = list(iter_regrade(submissions, workers=2))
+    assert sorted(result["id"] for result in results) == ["0", "1", "2", "3", "4"]
+    assert all(result["passed"] == 2 for result in results)
+
+
+def test_problem_registry_indexes_lazily():
+    registry = ProblemRegistry(["attention_is_all_you_need", "lora_low_rank"])
+    assert registry._by_id is None
+    problem = registry.get("lora_low_rank_g2_topk_indices")
+    assert registry.get("lora_low_rank_g2_topk_indices") is problem
+    assert problem["paper_id"] == "lora_low_rank"
+    other = ProblemRegistry(["transformer_xl"]).get("transformer_xl_g2_topk_indices")
+    assert problem["tests"] is other["tests"]
+    assert len(registry) == 6
+    assert [item["id"] for item in registry.for_paper("lora-low-rank")] == [
+        "lora_low_rank_g1_softmax",
+        "lora_low_rank_g2_topk_indices",
+        "lora_low_rank_g3_cosine_similarity",
+    ]
+    assert registry.for_paper("unknown") == []
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+
+
+TOPK_CODE = """
+def topk_indices(values, k):
+    return sorted(range(len(values)), key=lambda index: (-values[index], index))[:k]
+"""
+
+
+def test_generated_cases_are_cached_per_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(case_generators, "CASE_CACHE_DIR", tmp_path)
+    generator = get_problem("lora_low_rank_g2_topk_indices")["generated"]
+    path = case_generators.generated_cases_path(generator, "topk_indices")
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == generator["count"]
+    assert case_generators.generated_cases_path(generator, "topk_indices") == path
+    assert path.read_text(encoding="utf-8").splitlines() == lines
+
+    bumped = {**generator, "version": "2"}
+    assert case_generators.generated_cases_path(bumped, "topk_indices") != path
+    regenerated = list(case_generators.iter_generated_cases(generator, "topk_indices"))
+    assert [json.loads(line) for line in lines] == regenerated
+
+
+def test_submit_runs_hidden_generated_cases(tmp_path, monkeypatch):
+    monkeypatch.setattr(case_generators, "CASE_CACHE_DIR", tmp_path)
+    problem = get_problem("lora_low_rank_g2_topk_indices")
+    result = run_problem(problem, TOPK_CODE, run_all=True)
+    assert result["total"] == len(problem["tests"]) + problem["generated"]["count"]
+    assert result["passed"] == result["total"]
+    hidden = [case for case in result["cases"] if case.get("hidden")]
+    assert len(hidden) == problem["generated"]["count"]
+    assert all("args" not in case and "expected" not in case for case in hidden)
+
+    assert run_problem(problem, TOPK_CODE, run_all=False)["total"] == problem["run_count"]
+
+    index_order = "def topk_indices(values, k):\n    return sorted(sorted(range(len(values)), key=lambda i: -values[i])[:k])\n"
+    assert run_problem(problem, index_order, run_all=True)["failed"] > 0
+
+
+def _runner_namespace():
+    namespace = {"__name__": "judge_runner_under_test"}
+    exec(RUNNER_SOURCE, namespace)
+    return namespace
+
+
+class _ArrayLike:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def tolist(self):
+        return self.rows
+
+
+def test_comparator_tolerances():
+    is_close = _runner_namespace()["_is_close"]
+    assert is_close([[0.84147, 0.54030]], [[0.8415, 0.5403]], 1e-4, 0.0)
+    assert not is_close([0.8417], [0.8415], 1e-4, 0.0)
+    assert is_close([1000.5], [1000.0], 0.0, 1e-3)
+    assert is_close((1, 2), [1, 2], 1e-4, 0.0)
+    assert is_close({"a": [1.00001]}, {"a": [1]}, 1e-4, 0.0)
+    assert is_close(float("nan"), float("nan"), 1e-4, 0.0)
+    assert not is_close([1, 2], [1, 2, 3], 1e-4, 0.0)
+    assert not is_close({"a": 1}, {"b": 1}, 1e-4, 0.0)
+    assert not is_close("1", 1, 1e-4, 0.0)
+    assert is_close(_ArrayLike([[0.5, 1.0]]), [[0.50001, 1]], 1e-4, 0.0)
+    assert not is_close(_ArrayLike([[0.5]]), [[0.5, 1.0]], 1e-4, 0.0)
+
+
+def test_comparator_handles_deep_nesting():
+    is_close = _runner_namespace()["_is_close"]
+    actual = expected = 1.0
+    for _ in range(5000):
+        actual, expected = [actual], [expected]
+    assert is_close(actual, expected, 1e-4, 0.0)
+
+
+def test_run_problem_uses_spec_tolerance():
+    problem = get_problem("a1_positional_encoding")
+    loose = {**problem, "spec": {**problem["spec"], "abs_tol": 0.01}}
+    code = "def positional_encoding(max_len, d_model):\n    return [[0.005, 1.005, 0, 1]]\n"
+    assert run_problem(problem, code, run_all=False)["passed"] == 0
+    assert run_problem(loose, code, run_all=False)["passed"] == 1
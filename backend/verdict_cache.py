@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import ast
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from .evaluator import RUNNER_SOURCE, collect_result, stream_problem
+from .problems import Problem
+
+VERDICT_CACHE_SIZE = int(os.getenv("JUDGE_CACHE_SIZE", "1024"))
+VERDICT_CACHE_PATH = os.getenv("JUDGE_CACHE_PATH") or None
+# Persisted verdicts beyond this many rows are evicted oldest-first.
+VERDICT_CACHE_ROWS = int(os.getenv("JUDGE_CACHE_ROWS", "100000"))
+CACHEABLE_STATUSES = {"ok", "error"}
+
+
+def normalize_code(code: str) -> str:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return "\n".join(line.rstrip() for line in code.strip().splitlines())
+    return ast.dump(tree, annotate_fields=False)
+
+
+# Verdicts depend on the judge too: a new runner (e.g. different comparison
+# rules) must not reuse verdicts persisted by the previous deploy.
+RUNNER_VERSION = hashlib.sha256(RUNNER_SOURCE.encode("utf-8")).hexdigest()[:16]
+
+
+def tests_version(problem: Problem) -> str:
+    material = json.dumps(
+        {
+            "runner": RUNNER_VERSION,
+            "spec": problem["spec"],
+            "tests": problem["tests"],
+            "run_count": problem["run_count"],
+            "generated": problem.get("generated"),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(
+    problem: Problem, code: str, run_all: bool, fail_fast: bool = False, exact: bool = False
+) -> str:
+    """Key a verdict on the problem, mode and code.
+
+    By default the code is normalized so formatting edits share a verdict;
+    ``exact`` keys on the raw source for results whose tracebacks quote it.
+    """
+    mode = ("submit" if run_all else "run") + ("-fail-fast" if fail_fast else "") + ("-exact" if exact else "")
+    source = code if exact else normalize_code(code)
+    material = "\0".join([problem["id"], mode, tests_version(problem), source])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(result: dict[str, Any]) -> bool:
+    if result.get("status") not in CACHEABLE_STATUSES:
+        return False
+    # Performance verdicts depend on host load at the time of the run, so
+    # a slow run must not stick to the code; those results are re-measured.
+    if result.get("performance"):
+        return False
+    # Only errors raised by the code itself (the runner exiting with a
+    # positive status) belong to it; a runner killed by a signal or one that
+    # produced no summary is a host-side failure.
+    if result["status"] == "error":
+        return result.get("exitCode", 0) > 0
+    return True
+
+
+def has_traceback(result: dict[str, Any]) -> bool:
+    """Whether the result quotes line numbers or lines of the submitted source."""
+    if result.get("status") == "error":
+        return True
+    return any(case.get("error") and not case.get("timeout") for case in result.get("cases", []))
+
+
+class VerdictCache:
+    def __init__(
+        self,
+        max_entries: int = VERDICT_CACHE_SIZE,
+        path: Optional[str] = VERDICT_CACHE_PATH,
+        max_rows: int = VERDICT_CACHE_ROWS,
+    ):
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.max_rows = max(1, max_rows)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS verdicts (
+                        key TEXT PRIMARY KEY,
+                        problem_id TEXT NOT NULL,
+                        version TEXT NOT NULL,
+                        result TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_problem ON verdicts(problem_id)")
+
+    def get(
+        self, problem: Problem, code: str, run_all: bool, fail_fast: bool = False
+    ) -> Optional[dict[str, Any]]:
+        result = None
+        for exact in (False, True):
+            result = self._lookup(cache_key(problem, code, run_all, fail_fast, exact))
+            if result is not None:
+                break
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(
+        self,
+        problem: Problem,
+        code: str,
+        run_all: bool,
+        result: dict[str, Any],
+        fail_fast: bool = False,
+    ) -> None:
+        if not is_cacheable(result):
+            return
+        key = cache_key(problem, code, run_all, fail_fast, exact=has_traceback(result))
+        stored = copy.deepcopy(result)
+        self._remember(key, stored)
+        if self.path is not None:
+            version = tests_version(problem)
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM verdicts WHERE problem_id = ? AND version != ?",
+                    (problem["id"], version),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, problem_id, version, result) VALUES (?, ?, ?, ?)",
+                    (key, problem["id"], version, json.dumps(stored)),
+                )
+                # Rowids grow with each write, so this keeps at most the newest max_rows.
+                conn.execute(
+                    "DELETE FROM verdicts WHERE rowid <= (SELECT max(rowid) FROM verdicts) - ?",
+                    (self.max_rows,),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.path is not None:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM verdicts")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _remember(self, key: str, result: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return result
+        if self.path is None:
+            return None
+        result = self._load(key)
+        if result is not None:
+            self._remember(key, result)
+        return result
+
+    def _load(self, key: str) -> Optional[dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM verdicts WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction and close it afterwards."""
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            yield conn
+
+
+_cache: Optional[VerdictCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> VerdictCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VerdictCache()
+        return _cache
+
+
+def stream_cached(
+    problem: Problem, code: str, run_all: bool, fail_fast: bool = False, profile: bool = False
+) -> Iterator[dict[str, Any]]:
+    if profile:
+        yield from stream_problem(problem, code, run_all, fail_fast=fail_fast, profile=True)
+        return
+
+    cache = get_verdict_cache()
+    cached = cache.get(problem, code, run_all, fail_fast)
+    if cached is not None:
+        for index, case in enumerate(cached.pop("cases")):
+            yield {"event": "case", "index": index, **case}
+        yield {"event": "summary", **cached, "cached": True, "queueWait": 0.0}
+        return
+
+    messages: list[dict[str, Any]] = []
+    for message in stream_problem(problem, code, run_all, fail_fast=fail_fast):
+        if message["event"] == "summary":
+            message["cached"] = False
+            messages.append(message)
+            cache.put(problem, code, run_all, collect_result(messages), fail_fast)
+        else:
+            messages.append(message)
+        yield message
+
+
+def run_cached(
+    problem: Problem, code: str, run_all: bool, fail_fast: bool = False, profile: bool = False
+) -> dict[str, Any]:
+    return collect_result(stream_cached(problem, code, run_all, fail_fast=fail_fast, profile=profile))
@@ -1,12 +1,56 @@
 import { screen } from "@testing-library/react";
-import { expect, it } from "vitest";
+import userEvent from "@testing-library/user-event";
+import { expect, it, vi } from "vitest";
+import { streamSubmitProblem, type StreamHandlers } from "../api/judge";
 import PaperProblem from "../pages/PaperProblem";
 import { renderWithRouter } from "../test-utils";
 
+vi.mock("../api/judge", () => ({
+  runProblem: vi.fn(),
+  streamSubmitProblem: vi.fn(async (_payload, handlers: StreamHandlers) => {
+    const cases = [
+      { ok: true, args: [2, 4], expected: [[0, 1, 0, 1]], output: [[0, 1, 0, 1]] },
+      ...Array.from({ length: 200 }, (_, index) =>
+        index === 7 ? { ok: false, hidden: true, error: "AssertionError" } : { ok: true, hidden: true },
+      ),
+    ];
+    cases.forEach((caseItem, index) => handlers.onCase?.({ ...caseItem, index }));
+    handlers.onSummary?.({ status: "ok", passed: 200, failed: 1, total: 201, duration: 0.5, output: "", error: "" });
+  }),
+}));
+
+const route = {
+  route: "/papers/attention_is_all_you_need/problems/a1_positional_encoding",
+  path: "/papers/:paperId/problems/:problemId",
+};
+
 it("renders the problem title", () => {
-  renderWithRouter(<PaperProblem />, {
-    route: "/papers/attention_is_all_you_need/problems/a1_positional_encoding",
-    path: "/papers/:paperId/problems/:problemId",
-  });
+  renderWithRouter(<PaperProblem />, route);
   expect(screen.getByText("位置编码")).toBeInTheDocument();
 });
+
+it("summarises hidden cases instead of listing them", async () => {
+  renderWithRouter(<PaperProblem />, route);
+  await userEvent.click(screen.getByRole("button", { name: "提交" }));
+  expect(await screen.findByText("隐藏用例：通过 199 / 200")).toBeInTheDocument();
+  expect(screen.getByText("用例 9 失败：AssertionError")).toBeInTheDocument();
+  expect(screen.getAllByText(/^输入：/)).toHaveLength(1);
+});
+
+it("renders submitted cases before the summary arrives", async () => {
+  let finish = () => {};
+  vi.mocked(streamSubmitProblem).mockImplementationOnce(async (_payload, handlers) => {
+    handlers.onCase?.({ ok: true, args: [2, 4], expected: [[0, 1, 0, 1]], output: [[0, 1, 0, 1]], index: 0 });
+    await new Promise<void>((resolve) => {
+      finish = resolve;
+    });
+    handlers.onSummary?.({ status: "ok", passed: 1, failed: 0, total: 1, duration: 0.1, output: "", error: "" });
+  });
+  renderWithRouter(<PaperProblem />, route);
+  await userEvent.click(screen.getByRole("button", { name: "提交" }));
+  expect(await screen.findByText("用例 1 通过")).toBeInTheDocument();
+  expect(screen.getByRole("button", { name: "提交中..." })).toBeDisabled();
+  finish();
+  expect(await screen.findByText("0.10s")).toBeInTheDocument();
+  expect(screen.getByRole("button", { name: "提交" })).toBeEnabled();
+});
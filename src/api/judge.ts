@@ -16,6 +16,35 @@ export type RunPayload = {
   paperId: string;
   problemId: string;
   code: string;
+  failFast?: boolean;
+  profile?: boolean;
+};
+
+export type PerformanceReport = {
+  ok: boolean;
+  skipped?: boolean;
+  timeout?: boolean;
+  error?: string;
+  sizes?: number[];
+  timings?: number[];
+  referenceTimings?: number[];
+  slowdown?: number;
+  exponent?: number;
+  maxSlowdown?: number | null;
+  maxExponent?: number | null;
+};
+
+export type ProfileReport = {
+  functions: Array<{
+    function: string;
+    file: string;
+    line: number;
+    calls: number;
+    primitiveCalls: number;
+    totalTime: number;
+    cumulativeTime: number;
+  }>;
+  lines: Array<{ line: number; hits: number; time: number; code: string }>;
 };
 
 export type RunResult = {
@@ -28,12 +57,25 @@ export type RunResult = {
   error: string;
   cases: Array<{
     ok: boolean;
-    args: unknown[];
-    expected: unknown;
-    output: unknown;
+    args?: unknown[];
+    expected?: unknown;
+    output?: unknown;
     error?: string;
+    timeout?: boolean;
+    skipped?: boolean;
+    hidden?: boolean;
+    cpuTime?: number;
+    wallTime?: number;
+    peakMemoryKb?: number | null;
   }>;
   limitApplied?: boolean;
+  queueWait?: number;
+  execTime?: number;
+  cached?: boolean;
+  cpuTime?: number;
+  peakMemoryKb?: number | null;
+  performance?: PerformanceReport | null;
+  profile?: ProfileReport | null;
 };
 
 export const runProblem = (payload: RunPayload) =>
@@ -41,11 +83,63 @@ export const runProblem = (payload: RunPayload) =>
     paper_id: payload.paperId,
     problem_id: payload.problemId,
     code: payload.code,
+    fail_fast: payload.failFast ?? false,
+    profile: payload.profile ?? false,
   });
 
-export const submitProblem = (payload: RunPayload) =>
-  postJson<RunResult>("/api/submit", {
-    paper_id: payload.paperId,
-    problem_id: payload.problemId,
-    code: payload.code,
+export type RunCase = RunResult["cases"][number] & { index: number };
+
+export type RunSummary = Omit<RunResult, "cases">;
+
+export type StreamHandlers = {
+  onCase?: (result: RunCase) => void;
+  onSummary?: (summary: RunSummary) => void;
+};
+
+async function postEventStream(path: string, payload: unknown, handlers: StreamHandlers): Promise<void> {
+  const response = await fetch(`${apiBase}${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify(payload),
   });
+  if (!response.ok || !response.body) {
+    throw new Error(`API error: ${response.status}`);
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value, { stream: !done });
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const fields = Object.fromEntries(
+        block.split("\n").map((line) => [line.slice(0, line.indexOf(":")), line.slice(line.indexOf(":") + 2)]),
+      );
+      const data = JSON.parse(fields.data ?? "{}");
+      if (fields.event === "case") {
+        handlers.onCase?.(data as RunCase);
+      } else if (fields.event === "summary") {
+        handlers.onSummary?.(data as RunSummary);
+      }
+      boundary = buffer.indexOf("\n\n");
+    }
+    if (done) {
+      return;
+    }
+  }
+}
+
+export const streamSubmitProblem = (payload: RunPayload, handlers: StreamHandlers) =>
+  postEventStream(
+    "/api/submit/stream",
+    {
+      paper_id: payload.paperId,
+      problem_id: payload.problemId,
+      code: payload.code,
+      fail_fast: payload.failFast ?? false,
+    },
+    handlers,
+  );
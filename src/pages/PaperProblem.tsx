@@ -4,7 +4,7 @@ import { Panel, PanelGroup, PanelResizeHandle } from "react-resizable-panels";
 import Editor from "@monaco-editor/react";
 import { findPaperById } from "../data/papers";
 import { difficultyStyles, getProblemById } from "../data/problems";
-import { runProblem, submitProblem } from "../api/judge";
+import { runProblem, streamSubmitProblem, type RunSummary } from "../api/judge";
 import { useLocalStorageState } from "../hooks/useLocalStorageState";
 import { useProgress } from "../hooks/useProgress";
 
@@ -15,12 +15,15 @@ const tabStyles = (active: boolean) =>
 
 type OutputCase = {
   ok: boolean;
-  args: unknown[];
-  expected: unknown;
-  output: unknown;
+  args?: unknown[];
+  expected?: unknown;
+  output?: unknown;
   error?: string;
+  hidden?: boolean;
 };
 
+const MAX_HIDDEN_FAILURES = 5;
+
 type RunResult = {
   status: "ok" | "error" | "timeout";
   passed: number;
@@ -56,6 +59,18 @@ export default function PaperProblem() {
     return Math.round((result.passed / result.total) * 100);
   }, [result]);
 
+  // Hidden cases carry no inputs or outputs, so they are summarised instead of listed.
+  const hiddenCases = useMemo(() => {
+    const cases = (result?.cases ?? [])
+      .map((caseItem, index) => ({ caseItem, index }))
+      .filter(({ caseItem }) => caseItem.hidden);
+    return {
+      total: cases.length,
+      passed: cases.filter(({ caseItem }) => caseItem.ok).length,
+      failures: cases.filter(({ caseItem }) => !caseItem.ok).slice(0, MAX_HIDDEN_FAILURES),
+    };
+  }, [result]);
+
   if (!hasProblem) {
     return (
       <div className="container mx-auto px-4 py-10">
@@ -76,14 +91,37 @@ export default function PaperProblem() {
     }
   };
 
+  // Submissions stream each case as it finishes, so results show up long
+  // before the whole (possibly hidden, hundreds-strong) suite is done.
   const handleSubmit = async () => {
     if (!paperId || !problemId) return;
     setSubmitting(true);
+    setResult({ status: "ok", passed: 0, failed: 0, total: 0, duration: 0, output: "", error: "", cases: [] });
+    setActiveTab("output");
+    const finished: { summary?: RunSummary } = {};
     try {
-      const payload = await submitProblem({ paperId, problemId, code });
-      setResult(payload);
-      setActiveTab("output");
-      if (payload.status === "ok" && payload.failed === 0) {
+      await streamSubmitProblem(
+        { paperId, problemId, code },
+        {
+          onCase: (caseItem) =>
+            setResult((current) =>
+              current
+                ? {
+                    ...current,
+                    passed: current.passed + (caseItem.ok ? 1 : 0),
+                    failed: current.failed + (caseItem.ok ? 0 : 1),
+                    total: current.cases.length + 1,
+                    cases: [...current.cases, caseItem],
+                  }
+                : current,
+            ),
+          onSummary: (summary) => {
+            finished.summary = summary;
+            setResult((current) => ({ ...summary, cases: current?.cases ?? [] }));
+          },
+        },
+      );
+      if (finished.summary?.status === "ok" && finished.summary.failed === 0) {
         markComplete(paperId, problemId);
       }
     } finally {
@@ -194,32 +232,54 @@ export default function PaperProblem() {
                           <span className="text-muted-foreground">
                             通过 {result.passed} / {result.total}
                           </span>
-                          <span className="text-muted-foreground">{result.duration.toFixed(2)}s</span>
+                          <span className="text-muted-foreground">
+                            {submitting ? "评测中..." : `${result.duration.toFixed(2)}s`}
+                          </span>
                         </div>
                         <div className="h-2 rounded-full bg-white/10">
                           <div className="h-2 rounded-full bg-emerald-400" style={{ width: `${progress}%` }} />
                         </div>
                         <div className="space-y-2">
-                          {result.cases.map((caseItem, index) => (
+                          {result.cases.map((caseItem, index) =>
+                            caseItem.hidden ? null : (
+                              <div
+                                key={String(index)}
+                                className={`border rounded-md p-2 ${
+                                  caseItem.ok ? "border-emerald-500/30" : "border-rose-500/30"
+                                }`}
+                              >
+                                <div className="text-xs text-muted-foreground">
+                                  用例 {index + 1} {caseItem.ok ? "通过" : "失败"}
+                                </div>
+                                <div>输入：{JSON.stringify(caseItem.args)}</div>
+                                <div>输出：{JSON.stringify(caseItem.output)}</div>
+                                <div>期望：{JSON.stringify(caseItem.expected)}</div>
+                                {caseItem.error ? (
+                                  <pre className="mt-2 text-xs text-rose-400 whitespace-pre-wrap">
+                                    {caseItem.error}
+                                  </pre>
+                                ) : null}
+                              </div>
+                            ),
+                          )}
+                          {hiddenCases.total > 0 ? (
                             <div
-                              key={String(index)}
                               className={`border rounded-md p-2 ${
-                                caseItem.ok ? "border-emerald-500/30" : "border-rose-500/30"
+                                hiddenCases.passed === hiddenCases.total
+                                  ? "border-emerald-500/30"
+                                  : "border-rose-500/30"
                               }`}
                             >
                               <div className="text-xs text-muted-foreground">
-                                用例 {index + 1} {caseItem.ok ? "通过" : "失败"}
+                                隐藏用例：通过 {hiddenCases.passed} / {hiddenCases.total}
                               </div>
-                              <div>输入：{JSON.stringify(caseItem.args)}</div>
-                              <div>输出：{JSON.stringify(caseItem.output)}</div>
-                              <div>期望：{JSON.stringify(caseItem.expected)}</div>
-                              {caseItem.error ? (
-                                <pre className="mt-2 text-xs text-rose-400 whitespace-pre-wrap">
-                                  {caseItem.error}
-                                </pre>
-                              ) : null}
+                              {hiddenCases.failures.map(({ caseItem, index }) => (
+                                <div key={String(index)} className="mt-1 text-xs text-rose-400">
+                                  用例 {index + 1} 失败{caseItem.error ? `：${caseItem.error}` : ""}
+                                </div>
+                              ))}
                             </div>
-                          ))}
+                          ) : null}
                         </div>
                       </>
                     ) : (